@@ -0,0 +1,253 @@
+"""Time and memory-profile each pipeline stage on synthetic exports of several sizes.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pipeline --sizes 10k,100k,1m --output bench.json
+    python -m benchmarks.bench_pipeline --sizes 10k,100k --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_pipeline --sizes 10k,100k --baseline benchmarks/baseline.json
+
+Exports are generated once per size and seed under --data-dir and reused. With
+--baseline, the exit status is 1 if any stage got slower or hungrier than the
+baseline by more than --tolerance.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import streamlit.config
+import streamlit.logger
+
+from benchmarks.generate_tickets import generate_tickets, parse_rows, write_export
+from utils1 import backends, cache
+from utils1.aggregations import compute_summaries
+from utils1.cleaning import clean_tickets
+from utils1.dashboard import dashboard
+from utils1.ingest import load_cleaned, read_frame
+from utils1.recommendation import recommendation
+from utils1.report import REPORT_BACKENDS, report
+
+STAGES = ["read", "clean", "load_cleaned", "summaries", "dashboard", "recommendation", "report"]
+DEFAULT_SIZES = "10k,100k,1m"
+DEFAULT_DATA_DIR = os.path.join("benchmarks", "data")
+TOLERANCE = 0.25
+# Differences below these are noise whatever the ratio.
+MIN_SECONDS_DELTA = 0.05
+MIN_MB_DELTA = 5.0
+
+_run_ids = itertools.count()
+
+# The tabs are st.fragment functions, which do nothing outside a Streamlit
+# script run, so the benchmark calls the functions they wrap.
+dashboard = getattr(dashboard, '__wrapped__', dashboard)
+recommendation = getattr(recommendation, '__wrapped__', recommendation)
+
+
+def _fresh_key(rows):
+    # The tabs memoize summaries per dataset key, so every run gets a new one
+    # to measure a first render rather than a memo hit.
+    return f"bench-{rows}-{next(_run_ids)}"
+
+
+def _rss_mb():
+    # Linux only; elsewhere the RSS column is left empty.
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _RssSampler:
+    # Polls resident memory while a stage runs; growth over the starting RSS
+    # catches the Arrow string buffers that tracemalloc cannot see.
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start_mb = self.peak_mb = _rss_mb()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+
+    def _poll(self):
+        while not self._done.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, _rss_mb())
+
+    def __enter__(self):
+        if self.start_mb is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        if self.start_mb is not None:
+            self._thread.join()
+            self.peak_mb = max(self.peak_mb, _rss_mb())
+
+    @property
+    def growth_mb(self):
+        return None if self.start_mb is None else self.peak_mb - self.start_mb
+
+
+def measure(fn, repeat=1, memory=True):
+    # Best wall time over repeat runs, then one more run under tracemalloc for
+    # the peak Python-heap allocation (numpy buffers included) and RSS growth.
+    timings = []
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        timings.append(time.perf_counter() - start)
+    peak_mb = rss_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            with _RssSampler() as rss:
+                fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            rss_mb = rss.growth_mb
+        finally:
+            tracemalloc.stop()
+    return value, min(timings), peak_mb, rss_mb
+
+
+def bench_size(path, rows, stages=STAGES, repeat=1, memory=True, backend="vector"):
+    results = []
+
+    def stage(name, fn):
+        # Unselected stages still run once when a later stage needs their output.
+        if name not in stages:
+            return fn()
+        value, seconds, peak_mb, rss_mb = measure(fn, repeat, memory)
+        results.append({"rows": rows, "stage": name, "seconds": round(seconds, 4),
+                        "peak_mb": None if peak_mb is None else round(peak_mb, 2),
+                        "rss_mb": None if rss_mb is None else round(rss_mb, 2)})
+        line = f"{rows:>10,}  {name:<16}{seconds:>10.3f}s"
+        if peak_mb is not None:
+            line += f"{peak_mb:>10.1f} MB heap"
+        if rss_mb is not None:
+            line += f"{rss_mb:>10.1f} MB rss"
+        print(line, flush=True)
+        return value
+
+    needs_df = {"clean", "summaries", "dashboard", "recommendation", "report"} & set(stages)
+    raw = stage("read", lambda: read_frame(path)) if needs_df or "read" in stages else None
+    df = stage("clean", lambda: clean_tickets(raw)[0]) if needs_df else None
+    raw = None  # release the raw frame before the later stages are measured
+    if "load_cleaned" in stages:
+        stage("load_cleaned", lambda: load_cleaned(path))
+    summaries = stage("summaries", lambda: compute_summaries(df)) if needs_df else None
+    if "dashboard" in stages:
+        stage("dashboard", lambda: dashboard(df.copy(deep=False), _fresh_key(rows)))
+    if "recommendation" in stages:
+        stage("recommendation", lambda: recommendation(df.copy(deep=False), _fresh_key(rows)))
+    if "report" in stages:
+        stage("report", lambda: report(df, summaries, backend=backend))
+    return results
+
+
+def warm_up(backend="vector"):
+    # One small pass first, so Plotly/ReportLab imports and template setup are
+    # not billed to whichever size happens to run first.
+    df, _ = clean_tickets(generate_tickets(1_000))
+    dashboard(df.copy(deep=False), _fresh_key(0))
+    recommendation(df.copy(deep=False), _fresh_key(0))
+    report(df, compute_summaries(df), backend=backend)
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    # Stages or sizes missing from the baseline are not compared.
+    base = {(entry["rows"], entry["stage"]): entry for entry in baseline.get("results", [])}
+    regressions = []
+    for entry in results:
+        old = base.get((entry["rows"], entry["stage"]))
+        if old is None:
+            continue
+        for metric, floor in (("seconds", MIN_SECONDS_DELTA), ("peak_mb", MIN_MB_DELTA)):
+            new_value, old_value = entry.get(metric), old.get(metric)
+            if new_value is None or old_value is None:
+                continue
+            if new_value > old_value * (1 + tolerance) and new_value - old_value > floor:
+                regressions.append({"rows": entry["rows"], "stage": entry["stage"], "metric": metric,
+                                    "baseline": old_value, "current": new_value,
+                                    "ratio": round(new_value / old_value, 2) if old_value else None})
+    return regressions
+
+
+def _environment():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated row counts, e.g. 10k,100k,1m,5m")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated subset of the stages")
+    parser.add_argument("--format", choices=["csv", "parquet", "xlsx"], default="csv", help="Export format to read")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Where generated exports are kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per stage; the best is kept")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run of each stage")
+    parser.add_argument("--backend", choices=REPORT_BACKENDS, default="vector", help="PDF chart backend")
+    parser.add_argument("--compute-backend", choices=backends.BACKEND_NAMES, default=backends.COMPUTE_BACKEND,
+                        help="Engine for date parsing and summaries")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this results file and fail on regressions")
+    parser.add_argument("--save-baseline", help="Also write the results here as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Allowed slowdown or memory growth as a fraction (default 0.25)")
+    args = parser.parse_args(argv)
+
+    stages = [name.strip() for name in args.stages.split(",") if name.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+    sizes = [parse_rows(size) for size in args.sizes.split(",") if size.strip()]
+
+    # Quiet Streamlit's bare-mode warnings, and give the raster backend an empty cache.
+    streamlit.config.get_option("logger.level")  # parsing the config resets log levels
+    streamlit.logger.set_log_level("error")
+    cache.CACHE_DIR = tempfile.mkdtemp(prefix="bench_pipeline_")
+    backends.COMPUTE_BACKEND = args.compute_backend
+
+    warm_up(args.backend)
+    results = []
+    for rows in sizes:
+        path = os.path.join(args.data_dir, f"tickets_{rows}_seed{args.seed}.{args.format}")
+        if not os.path.exists(path):
+            print(f"Generating {rows:,} tickets at {path}", flush=True)
+            write_export(path, rows, args.seed)
+        results.extend(bench_size(path, rows, stages, args.repeat, not args.no_memory, args.backend))
+
+    payload = {"environment": _environment(), "compute_backend": args.compute_backend, "format": args.format,
+               "seed": args.seed, "results": results}
+    for target in (args.output, args.save_baseline):
+        if target:
+            with open(target, "w") as fh:
+                json.dump(payload, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for reg in regressions:
+            print(f"REGRESSION {reg['rows']:,} rows {reg['stage']} {reg['metric']}: "
+                  f"{reg['baseline']} -> {reg['current']} ({reg['ratio']}x)")
+        if regressions:
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,46 @@
+"""Compare PDF report backends on one export.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_report path/to/export.xlsx --repeat 3
+"""
+import argparse
+import tempfile
+import time
+
+from utils1 import cache
+from utils1.aggregations import compute_summaries
+from utils1.ingest import load_cleaned
+from utils1.report import REPORT_BACKENDS, report
+
+
+def bench_backend(df, summaries, backend, repeat):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(report(df, summaries, backend=backend).getvalue())
+        timings.append(time.perf_counter() - start)
+    return {"backend": backend, "first_s": timings[0], "best_s": min(timings), "bytes": size}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="Incident export (xlsx, csv or parquet)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backend", choices=REPORT_BACKENDS, action="append",
+                        help="Backend(s) to run; defaults to all")
+    args = parser.parse_args(argv)
+
+    # A throwaway cache directory, so the raster backend's first run really renders.
+    cache.CACHE_DIR = tempfile.mkdtemp(prefix="bench_report_")
+    df = load_cleaned(args.path)
+    summaries = compute_summaries(df)
+    print(f"{len(df):,} rows")
+    print(f"{'backend':<10}{'first (s)':>12}{'best (s)':>12}{'size (KB)':>12}")
+    for backend in args.backend or REPORT_BACKENDS:
+        result = bench_backend(df, summaries, backend, args.repeat)
+        print(f"{backend:<10}{result['first_s']:>12.2f}{result['best_s']:>12.2f}{result['bytes'] / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Check that every compute backend cleans and summarizes synthetic exports identically.
+
+Usage (from the repository root):
+    python -m benchmarks.check_backends --sizes 10k,200k --backends pandas,polars
+
+Parsed dates, counts and their order must match exactly. Means are compared
+with a relative tolerance of --rtol: the engines sum in different orders, so
+the last bits of a float64 mean can differ. Each backend is also timed on the
+stages it takes part in. The exit status is 1 on any mismatch.
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.generate_tickets import generate_tickets, parse_rows
+from utils1 import backends
+from utils1.aggregations import compute_summaries
+from utils1.cleaning import clean_tickets
+
+RTOL = 1e-9
+
+
+def run_backend(raw, name):
+    backends.COMPUTE_BACKEND = name
+    start = time.perf_counter()
+    df, _ = clean_tickets(raw)
+    cleaned = time.perf_counter()
+    summaries = compute_summaries(df, backends.get_backend(name))
+    done = time.perf_counter()
+    return df, summaries, cleaned - start, done - cleaned
+
+
+def _mismatch(check, *args, **kwargs):
+    try:
+        check(*args, **kwargs)
+    except AssertionError as exc:
+        return str(exc).splitlines()[0]
+    return None
+
+
+def compare(expected, actual, rtol=RTOL):
+    # Returns (what, message) pairs; empty when the backends agree.
+    (df_a, sum_a), (df_b, sum_b) = expected, actual
+    problems = [('cleaned frame', _mismatch(pd.testing.assert_frame_equal, df_a, df_b))]
+    for dim in sorted(set(sum_a.counts) | set(sum_b.counts)):
+        if dim not in sum_a.counts or dim not in sum_b.counts:
+            problems.append((f'counts[{dim}]', 'missing from one backend'))
+            continue
+        problems.append((f'counts[{dim}]', _mismatch(pd.testing.assert_series_equal,
+                                                     sum_a.counts[dim], sum_b.counts[dim])))
+    for name in ('monthly', 'hourly'):
+        problems.append((name, _mismatch(pd.testing.assert_series_equal,
+                                         getattr(sum_a, name), getattr(sum_b, name))))
+    problems.append(('department_resolution', _mismatch(
+        pd.testing.assert_series_equal, sum_a.department_resolution, sum_b.department_resolution,
+        check_exact=False, rtol=rtol)))
+    for name in ('rows', 'columns', 'department_count'):
+        if getattr(sum_a, name) != getattr(sum_b, name):
+            problems.append((name, f"{getattr(sum_a, name)} != {getattr(sum_b, name)}"))
+    if abs(sum_a.resolution_mean - sum_b.resolution_mean) > rtol * abs(sum_a.resolution_mean):
+        problems.append(('resolution_mean', f"{sum_a.resolution_mean} != {sum_b.resolution_mean}"))
+    return [(what, message) for what, message in problems if message]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10k,200k", help="Comma-separated row counts")
+    parser.add_argument("--backends", default=",".join(backends.BACKEND_NAMES),
+                        help="Comma-separated backends; the first is the reference")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rtol", type=float, default=RTOL, help="Relative tolerance for means")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.backends.split(",") if name.strip()]
+    unknown = set(names) - set(backends.BACKEND_NAMES)
+    if unknown:
+        parser.error(f"unknown backend(s): {', '.join(sorted(unknown))}")
+    configured = backends.COMPUTE_BACKEND
+    failures = 0
+    try:
+        for rows in [parse_rows(size) for size in args.sizes.split(",") if size.strip()]:
+            raw = generate_tickets(rows, args.seed)
+            reference = None
+            for name in names:
+                df, summaries, clean_s, summary_s = run_backend(raw, name)
+                line = f"{rows:>10,}  {name:<8} clean {clean_s:>7.3f}s  summaries {summary_s:>7.3f}s"
+                if reference is None:
+                    reference = (df, summaries)
+                    print(f"{line}  (reference)", flush=True)
+                    continue
+                problems = compare(reference, (df, summaries), args.rtol)
+                print(f"{line}  {'MISMATCH' if problems else 'identical'}", flush=True)
+                for what, message in problems:
+                    print(f"    {what}: {message}")
+                failures += bool(problems)
+    finally:
+        backends.COMPUTE_BACKEND = configured
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
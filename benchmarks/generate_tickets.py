@@ -0,0 +1,216 @@
+"""Write a synthetic incident export with realistic columns and messy values.
+
+Usage (from the repository root):
+    python -m benchmarks.generate_tickets 100000 tickets_100k.csv --seed 1
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+DEPARTMENTS = ['IT', 'Finance', 'HR', 'Operations', 'Sales', 'Legal', 'Procurement', 'Facilities']
+SITES = ['KL', 'PG', 'JB', 'KK', 'KCH']
+CATEGORIES = ['Hardware', 'Software', 'Network', 'Access', 'Email', 'Printing', 'Telephony']
+PRIORITIES = ['Low', 'Medium', 'High', 'Urgent']
+PRIORITY_WEIGHTS = [0.45, 0.35, 0.15, 0.05]
+# Resolution and first-response targets per priority, in hours.
+SLA_RESOLUTION_HOURS = {'Low': 72, 'Medium': 24, 'High': 8, 'Urgent': 4}
+SLA_RESPONSE_HOURS = {'Low': 4, 'Medium': 1, 'High': 0.5, 'Urgent': 0.25}
+OPEN_STATUSES = ['Open', 'Onhold', 'In Progress']
+STATUS_WEIGHTS = {'Closed': 0.6, 'Resolved': 0.3, 'Open': 0.04, 'Onhold': 0.04, 'In Progress': 0.02}
+TECHNICIANS = [f"Technician {i:02d}" for i in range(1, 41)]
+SUBJECTS = ['Cannot log in', 'Laptop not booting', 'VPN disconnects', 'Printer jammed', 'Mailbox full',
+            'Request new software', 'Password reset', 'Slow network', 'Monitor flickering', 'Access request']
+# Ticket volume by hour of day: a business-hours peak with a lunch dip.
+HOUR_WEIGHTS = np.array([1, 1, 1, 1, 1, 2, 4, 8, 14, 16, 15, 13, 9, 12, 14, 13, 11, 8, 5, 3, 2, 2, 1, 1], dtype=float)
+
+DATE_FORMAT = "%d/%m/%Y %H:%M"
+START = pd.Timestamp('2023-01-01')
+SPAN_DAYS = 730
+# Share of date cells that get stray whitespace, and that are blank or junk.
+PADDED_FRACTION = 0.05
+JUNK_FRACTION = 0.005
+DEFAULT_CHUNK_ROWS = 250_000
+XLSX_MAX_ROWS = 1_048_575
+_PAD2 = np.array([f"{i:02d}" for i in range(100)], dtype=object)
+
+
+def _choice(rng, values, rows, weights=None):
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float) / np.sum(weights)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), rows, p=weights)]
+
+
+def _format_distinct(values, fmt):
+    # Formats each distinct value once; row-wise strftime/zfill dominate otherwise.
+    codes, uniques = pd.factorize(values)
+    return np.array([fmt(value) for value in uniques], dtype=object)[codes]
+
+
+def _duration_text(hours):
+    # "HH:MM:SS" with hours allowed past 24, as the exports write them; NaN stays blank.
+    seconds = np.round(np.asarray(hours, dtype=float) * 3600)
+    valid = ~np.isnan(seconds)
+    secs = seconds[valid].astype('int64')
+    text = np.full(len(seconds), None, dtype=object)
+    text[valid] = (_format_distinct(secs // 3600, lambda h: f"{h:02d}") + ":" + _PAD2[secs // 60 % 60]
+                   + ":" + _PAD2[secs % 60])
+    return text
+
+
+def _messy_dates(stamps, rng):
+    stamps = pd.DatetimeIndex(stamps)
+    text = (_format_distinct(stamps.normalize(), lambda day: day.strftime(DATE_FORMAT.split()[0])) + " "
+            + _PAD2[stamps.hour] + ":" + _PAD2[stamps.minute])
+    padded = rng.random(len(text)) < PADDED_FRACTION
+    text[padded] = " " + text[padded] + " "
+    junk = rng.random(len(text)) < JUNK_FRACTION
+    text[junk] = rng.choice(np.array(['', '-', 'N/A'], dtype=object), int(junk.sum()))
+    return text
+
+
+def _flags(rng, values):
+    # Exports mix real booleans with several text spellings of them.
+    spellings = rng.integers(0, 3, len(values))
+    return np.where(spellings == 0, values,
+                    np.where(spellings == 1, np.where(values, 'Yes', 'No'),
+                             np.where(values, 'true', 'false'))).astype(object)
+
+
+def generate_chunk(rows, rng, first_id=1):
+    days = rng.integers(0, SPAN_DAYS, rows)
+    weekday = (START + pd.to_timedelta(days, unit='D')).dayofweek.to_numpy()
+    # Thin out weekends by redrawing most of them once.
+    weekend = (weekday >= 5) & (rng.random(rows) < 0.7)
+    days[weekend] = rng.integers(0, SPAN_DAYS, int(weekend.sum()))
+    hours = rng.choice(24, rows, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    created = START + pd.to_timedelta(days * 86400 + hours * 3600 + rng.integers(0, 3600, rows), unit='s')
+
+    priority = _choice(rng, PRIORITIES, rows, PRIORITY_WEIGHTS)
+    sla_resolution = pd.Series(priority).map(SLA_RESOLUTION_HOURS).to_numpy(dtype=float)
+    sla_response = pd.Series(priority).map(SLA_RESPONSE_HOURS).to_numpy(dtype=float)
+    status = _choice(rng, list(STATUS_WEIGHTS), rows, list(STATUS_WEIGHTS.values()))
+    is_open = np.isin(status, OPEN_STATUSES)
+
+    # Most tickets land inside their SLA, with a long tail of slow ones.
+    resolution_hours = rng.lognormal(np.log(sla_resolution * 0.5), 1.0)
+    resolution_hours[is_open] = np.nan
+    resolved = created + pd.to_timedelta(np.nan_to_num(resolution_hours) * 3600, unit='s')
+    response_hours = rng.exponential(sla_response * 0.6)
+    on_hold = np.where(status == 'Onhold', rng.exponential(12, rows),
+                       np.where(rng.random(rows) < 0.15, rng.exponential(4, rows), np.nan))
+
+    resolved_text = _messy_dates(resolved, rng)
+    resolved_text[is_open] = None
+    status_text = status.copy()
+    padded = rng.random(rows) < 0.1
+    status_text[padded] = " " + status_text[padded]
+    notes = np.full(rows, None, dtype=object)
+    noted = rng.random(rows) < 0.05
+    notes[noted] = "Follow up with user"
+
+    return pd.DataFrame({
+        'Request ID': np.arange(first_id, first_id + rows),
+        'Subject': _choice(rng, SUBJECTS, rows),
+        'Created Time': _messy_dates(created, rng),
+        'Resolved Time': resolved_text,
+        ' Technician': _choice(rng, TECHNICIANS + [None], rows),
+        'Department': _choice(rng, DEPARTMENTS, rows),
+        'Site': _choice(rng, SITES, rows),
+        'Category': _choice(rng, CATEGORIES, rows),
+        'Priority': priority,
+        'Request Status': status_text,
+        'SLA resolution time': _duration_text(sla_resolution),
+        'SLA response time': _duration_text(sla_response),
+        'On Hold Duration': _duration_text(on_hold),
+        'Response time elapsed': _duration_text(response_hours),
+        'Time Elapsed': _duration_text(resolution_hours),
+        'FCR': _flags(rng, rng.random(rows) < 0.3),
+        'VIP User': _flags(rng, rng.random(rows) < 0.05),
+        'ReOpened': _flags(rng, rng.random(rows) < 0.04),
+        'First Response Overdue Status': _flags(rng, response_hours > sla_response),
+        'Overdue Status': _flags(rng, resolution_hours > sla_resolution),
+        'Notes': notes,
+    })
+
+
+def iter_tickets(rows, seed=0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Deterministic for a given seed and chunk size, and never holds more than
+    # one chunk, so multi-million-row files can be written in bounded memory.
+    rng = np.random.default_rng(seed)
+    for first in range(0, rows, chunk_rows):
+        yield generate_chunk(min(chunk_rows, rows - first), rng, first_id=100_000 + first)
+
+
+def generate_tickets(rows, seed=0):
+    return pd.concat(iter_tickets(rows, seed), ignore_index=True)
+
+
+def _text_schema(columns):
+    import pyarrow as pa
+
+    return pa.schema([(col, pa.int64() if col == 'Request ID' else pa.string()) for col in columns])
+
+
+def write_export(path, rows, seed=0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.xlsx' and rows > XLSX_MAX_ROWS:
+        raise ValueError(f"Excel sheets hold at most {XLSX_MAX_ROWS:,} data rows; use csv or parquet.")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    chunks = iter_tickets(rows, seed, chunk_rows)
+
+    if ext == '.csv':
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    elif ext == '.parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in chunks:
+                # Everything but the ID is text, as in a real export.
+                chunk = chunk.astype({col: 'string' for col in chunk.columns if col != 'Request ID'})
+                if writer is None:
+                    writer = pq.ParquetWriter(path, _text_schema(chunk.columns))
+                writer.write_table(pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False))
+        finally:
+            if writer is not None:
+                writer.close()
+    elif ext == '.xlsx':
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        for i, chunk in enumerate(chunks):
+            if i == 0:
+                ws.append(list(chunk.columns))
+            for row in chunk.itertuples(index=False, name=None):
+                ws.append([None if isinstance(value, float) and np.isnan(value) else value for value in row])
+        wb.save(path)
+    else:
+        raise ValueError(f"Unsupported output type '{ext}'. Expected .csv, .parquet or .xlsx")
+    return path
+
+
+def parse_rows(text):
+    # "250000", "250k" and "5m" are all accepted.
+    text = str(text).strip().lower().replace("_", "").replace(",", "")
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", type=parse_rows, help="Number of tickets, e.g. 10000, 250k or 5m")
+    parser.add_argument("output", help="Output path ending in .csv, .parquet or .xlsx")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+    write_export(args.output, args.rows, args.seed, args.chunk_rows)
+    print(f"Wrote {args.rows:,} tickets to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Lets pytest import the app packages (utils1, benchmarks) from the repository root.
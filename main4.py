@@ -12,66 +12,126 @@ import tempfile
 from PIL import Image
 import base64
 import streamlit as st
-from utils1.report import report
+from utils1.cache import dataset_key, cached_frame, get_frame, put_frame, get_object, put_object
+from utils1.cleaning import CLEANING_VERSION, clean_tickets
+from utils1.ingest import SUPPORTED_TYPES, read_frame
+from utils1.aggregations import get_summaries
+from utils1.duplicates import DEFAULT_DUPLICATE_KEYS
+from utils1.store import TicketStore
+from utils1.profiling import ENABLED_BY_DEFAULT, TRACE_MEMORY, end_run, stage, start_run
 
 
 from utils1.data_cleaning import data_cleaning
 from utils1.recommendation import recommendation
 from utils1.dashboard import dashboard
-from utils1.report import report
+from utils1.export import export_section
 
 st.set_page_config(page_title="Incident Ticket Cleaner & Analyzer", layout="wide")
 st.title("📊 Incident Ticket Cleaner & Analyzer")
 st.markdown("Upload your dataset, view cleaning summary, explore insights, and download the cleaned file.")
 
+store = TicketStore()
+
 with st.sidebar:
     st.sidebar.image("logo.png")
     st.header("📂 Upload Data")
-    uploaded_file = st.file_uploader("Upload Incident Excel File", type=["xlsx"])
+    uploaded_file = st.file_uploader("Upload Incident Export (Excel, CSV or Parquet)", type=SUPPORTED_TYPES)
     st.markdown("""<small>Required columns: Created Time, Resolved Time, Technician, Department, etc.</small>""", unsafe_allow_html=True)
+    # Filled once an upload's columns are known.
+    duplicate_panel = st.container()
+
+    st.header("🗄️ Ticket Store")
+    stored_tickets = store.count()
+    st.caption(f"{stored_tickets:,} tickets stored locally")
+    use_store = st.toggle("Analyze stored history", disabled=stored_tickets == 0)
+
+    st.header("🩺 Diagnostics")
+    record_diagnostics = st.toggle("Record stage timings", value=ENABLED_BY_DEFAULT,
+                                   help="Times every pipeline stage on each rerun.")
+    trace_memory = record_diagnostics and st.checkbox("Trace peak memory (slower)", value=TRACE_MEMORY)
+
+if record_diagnostics:
+    start_run("rerun", memory=trace_memory)
+
+try:
+    df = None
+    if uploaded_file:
+        # Parsed frames are cached on the upload's content hash, so reruns skip the parse.
+        # Uploads keep the whole raw frame: the cleaning tab pages through it and the
+        # cleaning report is built from it. The flat-memory chunked path
+        # (ingest.load_cleaned) serves the batch tool, which needs neither.
+        with stage("hash upload"):
+            upload_key = dataset_key(uploaded_file.getvalue())
+        with stage("load raw (cached)") as record:
+            raw_df = cached_frame(upload_key, "raw", lambda: read_frame(uploaded_file))
+            if record is not None:
+                record.rows_out = len(raw_df)
+
+        with duplicate_panel:
+            st.header("🔁 Duplicates")
+            key_options = [str(col).strip() for col in raw_df.columns]
+            duplicate_keys = st.multiselect("Match duplicates on", key_options,
+                                            default=[key for key in DEFAULT_DUPLICATE_KEYS if key in key_options],
+                                            help="Leave empty to compare entire rows.")
+            drop_duplicates = st.checkbox("Drop duplicates while cleaning")
+
+        # The duplicate options are part of the cache key; dropping also changes the
+        # rows, so everything downstream gets its own dataset key too. So does the
+        # cleaning version, or exports and reports cached on disk would outlive a
+        # pipeline change.
+        options_key = dataset_key(repr((duplicate_keys, drop_duplicates)).encode())[:16]
+        data_key = f"{upload_key}-v{CLEANING_VERSION}" + (f"-{options_key}" if drop_duplicates else "")
+        cleaned_kind = f"cleaned-v{CLEANING_VERSION}-{options_key}"
+        with stage("load cleaned (cached)"):
+            cleaned_df = get_frame(upload_key, cleaned_kind)
+            cleaning_report = get_object(upload_key, f"{cleaned_kind}-report")
+            if cleaned_df is None or cleaning_report is None:
+                cleaned_df, cleaning_report = clean_tickets(raw_df, duplicate_keys, drop_duplicates)
+                put_frame(upload_key, cleaned_kind, cleaned_df)
+                put_object(upload_key, f"{cleaned_kind}-report", cleaning_report)
+        # Shallow copy: the tabs add helper columns, which must not leak into the shared cache.
+        df = cleaned_df.copy(deep=False)
+
+        with st.sidebar:
+            if st.button("➕ Add this export to the store"):
+                try:
+                    inserted, replaced, skipped = store.append(cleaned_df)
+                    st.success(f"Stored {inserted:,} new and {replaced:,} updated tickets"
+                               + (f" ({skipped:,} without a Request ID skipped)." if skipped else "."))
+                except ValueError as exc:
+                    st.error(str(exc))
+
+    if use_store:
+        # The store's version changes on every append, so its key does too.
+        data_key = f"store-{dataset_key(os.path.abspath(store.path).encode())}-{store.version()}"
+        df = cached_frame(data_key, "store", store.load).copy(deep=False)
+        get_summaries(df, data_key, compute=store.summaries)
+        raw_df = cleaning_report = None
+
+    # Only the chosen section runs; a tab bar would execute all four bodies on every rerun.
+    SECTIONS = ["🧺 Cleaning Summary", "📈 Recommendation", "Dashboard Overview", "📅 Export"]
+
+    if df is not None:
+        section = st.radio("Section", SECTIONS, horizontal=True, key="section", label_visibility="collapsed")
 
-if uploaded_file:
-    df = pd.read_excel(uploaded_file, engine='openpyxl')
-    
-
-    tab1, tab2, tab3, tab4 = st.tabs(["🧺 Cleaning Summary", "📈 Recommendation", "Dashboard Overview", "📅 Export"])
-  
-    with tab1:
-        df=data_cleaning(df, uploaded_file)
-
-    with tab2:
-        recommendation(df)
-
-    
-    with tab3:
-        dashboard(df)
-
-    with tab4:
-        st.subheader("📅 Download Cleaned Dataset")
-    
-        output = BytesIO()
-        df.to_csv(output, index=False)
-        output.seek(0)
-        st.download_button("📅 Download CSV", output, file_name="cleaned_file.csv", mime="text/csv")
-
-        st.subheader("📄 Export PDF Report")
-
-        if st.button("📄 Generate PDF Report"):
-            pdf_buffer = report(df, uploaded_file)  # Now only returns buffer
-            st.success("✅ PDF report generated.")
-
-            # --- PDF Preview ---
-            base64_pdf = base64.b64encode(pdf_buffer.getvalue()).decode('utf-8')
-            pdf_display = f"""
-            <iframe src="data:application/pdf;base64,{base64_pdf}" width="100%" height="800px" type="application/pdf"></iframe>
-            """
-            st.markdown("### 📄 Preview PDF")
-            st.components.v1.html(pdf_display, height=800)
-
-            # --- Download Button ---
-            st.download_button(
-                label="⬇️ Download PDF",
-                data=pdf_buffer,
-                file_name="ticket_report.pdf",
-                mime="application/pdf"
-            )
\ No newline at end of file
+        if section == SECTIONS[0]:
+            if cleaning_report is None:
+                st.info("Showing the stored ticket history. Upload an export to see its cleaning summary.")
+            else:
+                data_cleaning(cleaning_report, df, raw_df, data_key)
+        elif section == SECTIONS[1]:
+            recommendation(df, data_key)
+        elif section == SECTIONS[2]:
+            dashboard(df, data_key)
+        else:
+            export_section(df, data_key)
+finally:
+    # Also on errors and st.rerun(), so memory tracing stops and the panel shows what ran.
+    diagnostics = end_run()
+    if diagnostics is not None:
+        with st.expander("🩺 Diagnostics", expanded=False):
+            st.caption(f"This rerun took {diagnostics.seconds:.2f}s. Nested stages are indented"
+                       + ("; memory is the peak traced allocation within each stage." if diagnostics.memory else "."))
+            st.dataframe(diagnostics.to_frame(), hide_index=True, use_container_width=True)
+            st.download_button("⬇️ Download diagnostics (JSON)", diagnostics.to_json(),
+                               file_name="diagnostics.json", mime="application/json")
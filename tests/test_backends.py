@@ -0,0 +1,39 @@
+import pytest
+
+from benchmarks.check_backends import compare, run_backend
+from benchmarks.generate_tickets import generate_tickets
+from utils1 import backends
+
+
+def _mixed_sites(raw):
+    # Excel hands back numeric site codes as ints next to text codes.
+    raw = raw.copy()
+    raw['Site'] = raw['Site'].astype(object)
+    raw.loc[raw.index[::3], 'Site'] = 101
+    raw.loc[raw.index[1::7], 'Site'] = 7
+    return raw
+
+
+@pytest.fixture(autouse=True)
+def restore_backend(monkeypatch):
+    # run_backend switches the configured backend; monkeypatch puts it back.
+    monkeypatch.setattr(backends, "COMPUTE_BACKEND", backends.COMPUTE_BACKEND)
+
+
+def test_mixed_type_dimension_is_counted():
+    df, summaries = run_backend(_mixed_sites(generate_tickets(2_000, seed=3)), "pandas")[:2]
+    sites = summaries.counts['site']
+    assert sites.sum() == df['site'].notna().sum()
+    assert {101, 7} <= set(sites.index)
+    assert list(sites) == sorted(sites, reverse=True)
+
+
+@pytest.mark.parametrize("mixed", [False, True])
+def test_polars_matches_pandas(mixed):
+    pytest.importorskip("polars")
+    raw = generate_tickets(5_000, seed=3)
+    if mixed:
+        raw = _mixed_sites(raw)
+    expected = run_backend(raw, "pandas")[:2]
+    actual = run_backend(raw, "polars")[:2]
+    assert compare(expected, actual) == []
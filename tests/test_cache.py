@@ -0,0 +1,19 @@
+import os
+
+from utils1 import cache
+
+
+def _write(size):
+    def write(tmp):
+        with open(tmp, "wb") as fh:
+            fh.write(b"0" * size)
+    return write
+
+
+def test_file_over_budget_is_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(cache, "MAX_DISK_BYTES", 1024 * 1024)
+    older = cache.cached_file("small", "export", "csv", _write(500_000))
+    large = cache.cached_file("large", "export", "csv", _write(2 * 1024 * 1024))
+    assert os.path.exists(large)
+    assert not os.path.exists(older)
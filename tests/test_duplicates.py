@@ -0,0 +1,21 @@
+import pandas as pd
+
+from utils1.duplicates import DuplicateTracker
+
+
+def _tickets(ids):
+    return pd.DataFrame({'Request ID': ids, 'Subject': [f"ticket {i}" for i in range(len(ids))]})
+
+
+def test_blank_keys_are_never_duplicates():
+    tracker = DuplicateTracker(['Request ID'])
+    duplicated = tracker.update(_tickets(['1', None, '1', '', None, '  ']))
+    assert duplicated.tolist() == [False, False, True, False, False, False]
+    assert tracker.count == 1
+
+
+def test_blank_keys_across_chunks():
+    tracker = DuplicateTracker(['Request ID'])
+    tracker.update(_tickets(['1', None]))
+    assert tracker.update(_tickets([None, '1', '2'])).tolist() == [False, True, False]
+    assert tracker.count == 1
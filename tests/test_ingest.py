@@ -0,0 +1,44 @@
+import pandas as pd
+
+from utils1.ingest import load_cleaned
+
+
+def test_load_cleaned_with_blank_resolved_chunk(tmp_path):
+    # Newest tickets are still open, so the last chunk's Resolved Time is all
+    # blank and read as float; the first chunk's format must still apply.
+    rows = [{'Request ID': str(i),
+             'Created Time': f"0{i + 1}/03/2024 10:00",
+             'Resolved Time': f"0{i + 1}/03/2024 12:30" if i < 5 else "",
+             'Department': 'IT',
+             'Request Status': 'Closed' if i < 5 else 'Open'}
+            for i in range(10)]
+    path = tmp_path / "tickets.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+    df = load_cleaned(path, chunk_rows=5)
+
+    assert len(df) == 10
+    assert pd.api.types.is_datetime64_any_dtype(df['resolved_time'])
+    assert df['resolved_time'].notna().sum() == 5
+    assert sorted(df['resolution_time'].dropna().unique()) == [2.5]
+
+
+def test_xlsx_reads_first_sheet(tmp_path):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    tickets = wb.active
+    tickets.title = "Tickets"
+    tickets.append(["Request ID", "Created Time", "Department"])
+    tickets.append(["1", "01/03/2024 10:00", "IT"])
+    notes = wb.create_sheet("Notes")
+    notes.append(["Note"])
+    notes.append(["exported nightly"])
+    wb.active = 1  # saved with the Notes tab selected
+    path = tmp_path / "tickets.xlsx"
+    wb.save(path)
+
+    df = load_cleaned(path)
+
+    assert df['request_id'].tolist() == ['1']
+    assert df['department'].tolist() == ['IT']
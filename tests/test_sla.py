@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils1.sla import BusinessCalendar, business_hours_between, ticket_sla
+
+# 09:00-18:00, Monday to Friday; 2024-03-01 is a Friday.
+CALENDAR = BusinessCalendar()
+
+
+def _hours_between(start, end, calendar=CALENDAR):
+    return business_hours_between(pd.to_datetime([start]), pd.to_datetime([end]), calendar)[0]
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    ("2024-03-04 10:00", "2024-03-04 12:30", 2.5),   # within one day
+    ("2024-03-04 07:00", "2024-03-04 20:00", 9.0),   # clipped to working hours
+    ("2024-03-01 17:00", "2024-03-04 10:00", 2.0),   # over a weekend
+    ("2024-03-02 10:00", "2024-03-03 15:00", 0.0),   # weekend only
+    ("2024-03-04 09:00", "2024-03-11 09:00", 45.0),  # a full week
+])
+def test_business_hours_between(start, end, expected):
+    assert _hours_between(start, end) == pytest.approx(expected)
+
+
+def test_holidays_are_skipped():
+    calendar = BusinessCalendar(holidays=("2024-03-04",))
+    assert _hours_between("2024-03-01 17:00", "2024-03-05 10:00", calendar) == pytest.approx(2.0)
+
+
+def test_missing_or_reversed_times_are_nan():
+    hours = business_hours_between(pd.to_datetime(["2024-03-04 10:00", None]),
+                                   pd.to_datetime(["2024-03-04 09:00", "2024-03-04 10:00"]), CALENDAR)
+    assert np.isnan(hours).all()
+
+
+def _tickets(created, resolved, hold_hours, target_hours):
+    return pd.DataFrame({
+        'created_time': pd.to_datetime(created),
+        'resolved_time': pd.to_datetime(resolved),
+        'on_hold_duration': pd.to_timedelta(hold_hours, unit='h'),
+        'sla_resolution_time': pd.to_timedelta(target_hours, unit='h'),
+    })
+
+
+def test_weekend_hold_does_not_cancel_working_time():
+    # Open two working hours either side of a weekend spent on hold.
+    sla = ticket_sla(_tickets(["2024-03-01 17:00"], ["2024-03-04 10:00"], [48], [1]), CALENDAR)
+    assert sla['business_resolution_hours'].iloc[0] == pytest.approx(2.0)
+    assert not sla['sla_met'].iloc[0]
+
+
+def test_hold_within_working_hours_is_deducted():
+    sla = ticket_sla(_tickets(["2024-03-04 09:00", "2024-03-04 09:00"],
+                              ["2024-03-04 15:00", "2024-03-04 15:00"], [4, np.nan], [3, 3]), CALENDAR)
+    assert sla['business_resolution_hours'].tolist() == pytest.approx([2.0, 6.0])
+    assert sla['sla_met'].tolist() == [True, False]
+
+
+def test_hold_partly_outside_working_hours():
+    # 25 wall-clock hours, 10 of them working time: a 20 hour hold must cover
+    # at least 5 working hours.
+    sla = ticket_sla(_tickets(["2024-03-04 17:00"], ["2024-03-05 18:00"], [20], [8]), CALENDAR)
+    assert sla['business_resolution_hours'].iloc[0] == pytest.approx(5.0)
+    assert sla['sla_met'].iloc[0]
@@ -0,0 +1,154 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from utils1.backends import get_backend
+from utils1.dtypes import add_time_keys, month_label
+from utils1.profiling import profiled
+
+# Summaries shared by the dashboard, recommendation and PDF report tabs.
+DIMENSIONS = ['technician', 'department', 'site', 'category', 'priority']
+MAX_MEMO_ENTRIES = 64
+MAX_OUTLIERS_PER_GROUP = 50
+BOX_STATS_COLUMNS = ['q1', 'median', 'q3', 'count', 'lowerfence', 'upperfence', 'outliers']
+
+_memo = OrderedDict()
+_lock = threading.Lock()
+
+
+@dataclass
+class Summaries:
+    rows: int
+    columns: int
+    missing: pd.Series
+    counts: dict = field(default_factory=dict)
+    monthly: pd.Series = None
+    hourly: pd.Series = None
+    resolution_mean: float = float('nan')
+    department_resolution: pd.Series = None
+    department_count: int = 0
+
+
+@profiled("summaries")
+def compute_summaries(df, backend=None):
+    # backend defaults to the configured one (see utils1.backends); all of them
+    # give the same counts in the same order.
+    backend = backend or get_backend()
+    summaries = Summaries(rows=len(df), columns=df.shape[1], missing=df.isnull().sum())
+
+    for dim in DIMENSIONS:
+        if dim in df.columns:
+            summaries.counts[dim] = backend.value_counts(df[dim])
+
+    if 'department' in df.columns:
+        summaries.department_count = len(summaries.counts['department'])
+
+    if 'resolution_time' in df.columns:
+        summaries.resolution_mean = backend.mean(df['resolution_time'])
+        if 'department' in df.columns:
+            summaries.department_resolution = backend.group_mean(df['department'], df['resolution_time'])
+
+    if 'created_time' in df.columns:
+        # Integer month keys avoid building a Period/str column over every row;
+        # only the handful of distinct months get formatted. Cleaned frames carry
+        # the keys precomputed (see utils1.dtypes).
+        if 'created_month_key' not in df.columns:
+            df = add_time_keys(df.copy(deep=False))
+        monthly = backend.key_counts(df['created_month_key'])
+        monthly.index = pd.Index([month_label(key) for key in monthly.index], name='created_month')
+        summaries.monthly = monthly
+        summaries.hourly = backend.key_counts(df['created_hour'])
+
+    return summaries
+
+
+def get_summaries(df, dataset_key, start=None, end=None, compute=None):
+    # Memoized per dataset and date filter; df must be the frame that key and
+    # range describe, since it is only read on a miss. compute can supply the
+    # summaries another way (e.g. the ticket store's incremental counters).
+    memo_key = (dataset_key, start, end)
+    with _lock:
+        if memo_key in _memo:
+            _memo.move_to_end(memo_key)
+            return _memo[memo_key]
+    summaries = compute() if compute is not None else compute_summaries(df)
+    with _lock:
+        _memo[memo_key] = summaries
+        while len(_memo) > MAX_MEMO_ENTRIES:
+            _memo.popitem(last=False)
+    return summaries
+
+
+def count_frame(summaries, dim, label, value_label='count', top=None):
+    counts = summaries.counts.get(dim)
+    if counts is None:
+        return None
+    if top is not None:
+        counts = counts.head(top)
+    frame = counts.reset_index()
+    frame.columns = [label, value_label]
+    return frame
+
+
+def monthly_frame(summaries):
+    return summaries.monthly.rename('count').reset_index()
+
+
+def hourly_frame(summaries):
+    frame = summaries.hourly.reset_index()
+    frame.columns = ['Hour', 'Count']
+    return frame
+
+
+def histogram_bins(values, nbins=30):
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return np.array([0.0, 1.0]), np.array([0])
+    counts, edges = np.histogram(values, bins=nbins)
+    return edges, counts
+
+
+def _spread_sample(values, size):
+    # Evenly spaced over the sorted values, so the extremes are always shown.
+    values = np.sort(values)
+    if len(values) <= size:
+        return values
+    return values[np.linspace(0, len(values) - 1, size).round().astype(int)]
+
+
+@profiled("box stats")
+def box_stats(df, by, value, max_outliers=MAX_OUTLIERS_PER_GROUP):
+    # Tukey box per group: quartiles, whiskers at the most extreme points within
+    # 1.5 IQR, and a bounded sample of the points beyond them. by=None gives a
+    # single box over the whole column, labelled with the column name.
+    if by is None:
+        by = '_group'
+        data = pd.DataFrame({by: value, value: df[value]}).dropna()
+    else:
+        data = df[[by, value]].dropna()
+    if data.empty:
+        # e.g. an export with no resolved tickets yet: no boxes to draw.
+        return pd.DataFrame(columns=BOX_STATS_COLUMNS, index=pd.Index([], name=by))
+    groups = data.groupby(by, observed=True)[value]
+    stats = groups.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ['q1', 'median', 'q3']
+    iqr = stats['q3'] - stats['q1']
+    stats['lower_bound'] = stats['q1'] - 1.5 * iqr
+    stats['upper_bound'] = stats['q3'] + 1.5 * iqr
+    stats['count'] = groups.size()
+
+    bounds = stats.loc[data[by], ['lower_bound', 'upper_bound']].to_numpy()
+    values = data[value].to_numpy()
+    inside = (values >= bounds[:, 0]) & (values <= bounds[:, 1])
+    within = data[inside].groupby(by, observed=True)[value]
+    stats['lowerfence'] = within.min()
+    stats['upperfence'] = within.max()
+
+    samples = {key: _spread_sample(group[value].to_numpy(), max_outliers)
+               for key, group in data[~inside].groupby(by, observed=True)}
+    stats['outliers'] = [samples.get(key, np.array([])) for key in stats.index]
+    return stats.drop(columns=['lower_bound', 'upper_bound'])
@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# The column operations the cleaning and summary code spends its time in,
+# behind a small interface so a multi-threaded columnar engine can stand in for
+# pandas. Every backend returns the same pandas objects in the same order:
+# counts ranked by count then label, means as float64, keyed counts sorted by
+# key. benchmarks/check_backends.py compares them on synthetic exports.
+BACKEND_NAMES = ['pandas', 'polars']
+COMPUTE_BACKEND = os.environ.get("TICKET_COMPUTE_BACKEND", "pandas")
+
+_instances = {}
+
+
+def _ranked(labels, values, index_name, name, ascending=False):
+    frame = pd.DataFrame({'label': labels, 'value': values})
+    try:
+        frame = frame.sort_values('label', kind='stable')
+    except TypeError:
+        # Labels mixing numbers and text (e.g. Excel site codes 'KL' and 101) tie-break as text.
+        frame = frame.sort_values('label', kind='stable', key=lambda labels: labels.astype(str))
+    frame = frame.sort_values('value', ascending=ascending, kind='stable')
+    return pd.Series(frame['value'].to_numpy(), index=pd.Index(frame['label'].tolist(), name=index_name), name=name)
+
+
+def _mixed(series):
+    # Object columns holding more than one kind of value, which only pandas can hold.
+    return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True).startswith('mixed')
+
+
+def _keyed(keys, counts, index_name):
+    order = np.argsort(keys, kind='stable')
+    return pd.Series(np.asarray(counts, dtype='int64')[order],
+                     index=pd.Index(np.asarray(keys, dtype='int64')[order], name=index_name), name='count')
+
+
+class PandasBackend:
+    name = 'pandas'
+
+    def parse_datetime(self, text, fmt):
+        # text holds strings and missing values only.
+        return pd.to_datetime(text.str.strip(), format=fmt, errors='coerce')
+
+    def value_counts(self, series):
+        counts = series.value_counts(sort=False)
+        counts = counts[counts > 0]
+        return _ranked(counts.index.tolist(), counts.to_numpy(dtype='int64'), series.name, 'count')
+
+    def key_counts(self, series):
+        counts = series.value_counts(sort=False)
+        return _keyed(counts.index.to_numpy(dtype='int64'), counts.to_numpy(), series.name)
+
+    def mean(self, values):
+        return float(values.astype('float64').mean())
+
+    def group_mean(self, keys, values):
+        means = values.astype('float64').groupby(keys, observed=True).mean()
+        return _ranked(means.index.tolist(), means.to_numpy(), keys.name, values.name)
+
+
+class PolarsBackend:
+    name = 'polars'
+
+    def __init__(self):
+        try:
+            import polars
+        except ImportError as exc:
+            raise ImportError("The polars compute backend needs the 'polars' package (pip install polars).") from exc
+        self.pl = polars
+
+    def _series(self, series):
+        return self.pl.from_pandas(series)
+
+    def parse_datetime(self, text, fmt):
+        values = self._series(text.astype(object)).cast(self.pl.String)
+        parsed = values.str.strip_chars().str.strptime(self.pl.Datetime('us'), fmt, strict=False)
+        return pd.Series(parsed.to_numpy(), index=text.index, name=text.name)
+
+    def value_counts(self, series):
+        if _mixed(series):
+            return PandasBackend().value_counts(series)
+        counts = self._series(series).drop_nulls().value_counts(sort=False)
+        labels, values = counts.get_column(counts.columns[0]), counts.get_column('count')
+        return _ranked(labels.to_list(), values.to_numpy().astype('int64'), series.name, 'count')
+
+    def key_counts(self, series):
+        counts = self._series(series).drop_nulls().value_counts(sort=False)
+        return _keyed(counts.get_column(counts.columns[0]).to_numpy(), counts.get_column('count').to_numpy(),
+                      series.name)
+
+    def mean(self, values):
+        result = self._series(values).cast(self.pl.Float64).mean()
+        return float('nan') if result is None else float(result)
+
+    def group_mean(self, keys, values):
+        if _mixed(keys):
+            return PandasBackend().group_mean(keys, values)
+        frame = self.pl.DataFrame({'key': self._series(keys), 'value': self._series(values).cast(self.pl.Float64)})
+        means = frame.drop_nulls('key').group_by('key').agg(self.pl.col('value').mean())
+        return _ranked(means.get_column('key').to_list(), means.get_column('value').to_numpy(), keys.name,
+                       values.name)
+
+
+BACKENDS = {'pandas': PandasBackend, 'polars': PolarsBackend}
+
+
+def get_backend(name=None):
+    name = name or COMPUTE_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown compute backend '{name}'. Expected one of: {', '.join(BACKEND_NAMES)}")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
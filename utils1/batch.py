@@ -0,0 +1,181 @@
+"""Clean and report many incident exports in parallel, without the Streamlit UI.
+
+Usage (from the repository root):
+    python -m utils1.batch exports/ "archive/*.csv" --workers 8 --output-dir out/
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils1 import backends
+from utils1.aggregations import compute_summaries
+from utils1.cleaning import clean_tickets
+from utils1.duplicates import DEFAULT_DUPLICATE_KEYS, DuplicateTracker
+from utils1.ingest import SUPPORTED_TYPES, load_cleaned, read_frame
+from utils1.report import REPORT_BACKENDS, report
+from utils1.writers import EXPORT_FORMATS, export_frame, write_export
+
+OUTPUTS = ["csv", "pdf"]
+CLEANED_SUFFIX = "_cleaned"
+REPORT_SUFFIX = "_report"
+
+
+def output_stem(path):
+    # Keeps the input's extension, so x.csv and x.parquet in one directory do
+    # not write (and race on) the same output files.
+    name, ext = os.path.splitext(os.path.basename(path))
+    return f"{name}_{ext.lstrip('.').lower()}"
+
+
+def is_batch_output(path):
+    name = os.path.basename(path)
+    return any(name.endswith(f"{CLEANED_SUFFIX}.{fmt}") for fmt in EXPORT_FORMATS)
+
+
+def collect_inputs(patterns):
+    paths = []
+    for pattern in patterns:
+        # Skip this tool's own cleaned outputs, which land next to the inputs by
+        # default, so re-running over a directory or a pattern is safe. A file
+        # named outright is still taken.
+        if os.path.isdir(pattern):
+            for ext in SUPPORTED_TYPES:
+                paths.extend(path for path in glob.glob(os.path.join(pattern, f"*.{ext}"))
+                             if not is_batch_output(path))
+        else:
+            matches = glob.glob(pattern)
+            paths.extend(path for path in matches if path == pattern or not is_batch_output(path))
+            if not matches:
+                paths.append(pattern)
+    # Keep the first occurrence of each file, in a stable order.
+    return sorted(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+
+def process_file(path, output_dir=None, outputs=OUTPUTS, backend="vector", analysis_only=False,
+                 duplicate_keys=DEFAULT_DUPLICATE_KEYS, drop_duplicates=False, compute_backend=None,
+                 data_format="csv"):
+    if compute_backend is not None:
+        # Set here rather than by the parent, so spawned workers pick it up too.
+        backends.COMPUTE_BACKEND = compute_backend
+    timings = {}
+    result = {"path": path, "ok": False, "rows": None, "duplicates": None, "timings": timings, "outputs": [],
+              "error": None}
+    started = time.perf_counter()
+
+    def timed(stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        timings[stage] = round(time.perf_counter() - start, 3)
+        return value
+
+    try:
+        if analysis_only:
+            duplicates = DuplicateTracker(duplicate_keys)
+            df = timed("load_clean", load_cleaned, path, duplicates=duplicates, drop_duplicates=drop_duplicates)
+            result["duplicates"] = duplicates.count
+        else:
+            raw_df = timed("load", read_frame, path)
+            df, cleaning_report = timed("clean", clean_tickets, raw_df, duplicate_keys, drop_duplicates)
+            result["duplicates"] = cleaning_report.duplicate_count
+            del raw_df
+        result["rows"] = len(df)
+        summaries = timed("aggregate", compute_summaries, df)
+
+        out_dir = output_dir or os.path.dirname(path)
+        os.makedirs(out_dir, exist_ok=True)
+        stem = output_stem(path)
+        if "csv" in outputs:
+            csv_path = os.path.join(out_dir, f"{stem}{CLEANED_SUFFIX}.{data_format}")
+            timed("csv", write_export, export_frame(df), csv_path, data_format)
+            result["outputs"].append(csv_path)
+        if "pdf" in outputs:
+            pdf_path = os.path.join(out_dir, f"{stem}{REPORT_SUFFIX}.pdf")
+            buffer = timed("pdf", report, df, summaries, backend=backend)
+            with open(pdf_path, "wb") as fh:
+                fh.write(buffer.getvalue())
+            result["outputs"].append(pdf_path)
+        result["ok"] = True
+    except Exception as exc:
+        result["error"] = f"{type(exc).__name__}: {exc}"
+        result["traceback"] = traceback.format_exc()
+    timings["total"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _format_result(result):
+    status = "ok" if result["ok"] else "FAILED"
+    stages = ", ".join(f"{stage} {secs:.2f}s" for stage, secs in result["timings"].items())
+    rows = f"{result['rows']:,} rows" if result["rows"] is not None else "-"
+    if result["duplicates"]:
+        rows += f", {result['duplicates']:,} duplicates"
+    line = f"[{status}] {result['path']} ({rows}; {stages})"
+    if result["error"]:
+        line += f"\n    {result['error']}"
+    return line
+
+
+def run_batch(paths, workers=None, **options):
+    results = []
+    if workers == 1:
+        for path in paths:
+            results.append(process_file(path, **options))
+            print(_format_result(results[-1]), flush=True)
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process_file, path, **options) for path in paths]
+        for future in as_completed(futures):
+            results.append(future.result())
+            print(_format_result(results[-1]), flush=True)
+    return sorted(results, key=lambda result: result["path"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="Files, directories or glob patterns")
+    parser.add_argument("--output-dir", help="Write outputs here instead of next to each input")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: CPU count)")
+    parser.add_argument("--outputs", default=",".join(OUTPUTS), help="Comma-separated subset of: csv (cleaned data),pdf")
+    parser.add_argument("--data-format", choices=list(EXPORT_FORMATS), default="csv",
+                        help="File format of the cleaned-data output")
+    parser.add_argument("--backend", choices=REPORT_BACKENDS, default="vector",
+                        help="PDF chart backend; 'plotly' needs a kaleido-capable browser")
+    parser.add_argument("--analysis-columns-only", action="store_true",
+                        help="Stream only the analysed columns (lower memory; the CSV omits other columns)")
+    parser.add_argument("--duplicate-keys", default=",".join(DEFAULT_DUPLICATE_KEYS),
+                        help="Comma-separated columns that identify a duplicate ticket; empty compares whole rows")
+    parser.add_argument("--drop-duplicates", action="store_true", help="Keep only the first row for each key")
+    parser.add_argument("--compute-backend", choices=backends.BACKEND_NAMES, default=backends.COMPUTE_BACKEND,
+                        help="Engine for date parsing and summaries; 'polars' needs the polars package")
+    parser.add_argument("--summary-json", help="Also write per-file results to this JSON file")
+    args = parser.parse_args(argv)
+
+    outputs = [out.strip() for out in args.outputs.split(",") if out.strip()]
+    unknown = set(outputs) - set(OUTPUTS)
+    if unknown:
+        parser.error(f"unknown output(s): {', '.join(sorted(unknown))}")
+    paths = collect_inputs(args.inputs)
+    if not paths:
+        parser.error("no input files found")
+
+    started = time.perf_counter()
+    results = run_batch(paths, workers=args.workers, output_dir=args.output_dir, outputs=outputs,
+                        backend=args.backend, analysis_only=args.analysis_columns_only,
+                        duplicate_keys=[key.strip() for key in args.duplicate_keys.split(",") if key.strip()],
+                        drop_duplicates=args.drop_duplicates, compute_backend=args.compute_backend,
+                        data_format=args.data_format)
+    failed = [result for result in results if not result["ok"]]
+    print(f"\n{len(results) - len(failed)}/{len(results)} files processed in {time.perf_counter() - started:.2f}s")
+
+    if args.summary_json:
+        with open(args.summary_json, "w") as fh:
+            json.dump(results, fh, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+import getpass
+import hashlib
+import os
+import pickle
+import stat
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Parsed datasets are keyed on a hash of the uploaded bytes, so every Streamlit
+# rerun (and every session uploading the same export) reuses one parse.
+# Pickles are loaded from the cache directory, so it has to be private to the
+# user running the app: the default is per user, and any directory that another
+# user owns or can write to is refused.
+_OWNER = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+CACHE_DIR = os.environ.get("TICKET_CACHE_DIR", os.path.join(tempfile.gettempdir(), f"ticket_cache-{_OWNER}"))
+MAX_DISK_BYTES = int(os.environ.get("TICKET_CACHE_MAX_MB", "1024")) * 1024 * 1024
+MAX_MEMORY_BYTES = int(os.environ.get("TICKET_CACHE_MEMORY_MB", "512")) * 1024 * 1024
+
+_memory = OrderedDict()  # (key, kind) -> (value, estimated bytes), oldest first
+_memory_bytes = 0
+_trusted_dirs = set()
+_lock = threading.RLock()
+
+# pyarrow raises subclasses of these when a frame can't be written as Parquet
+# (e.g. object columns mixing numbers and text straight out of Excel).
+_PERSIST_ERRORS = (ImportError, OSError, ValueError, TypeError, NotImplementedError)
+
+
+def dataset_key(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _cache_dir():
+    # Creates the directory (owner-only) on first use and raises PermissionError
+    # if it is not a plain directory owned by this user and closed to others.
+    path = CACHE_DIR
+    with _lock:
+        if path in _trusted_dirs:
+            return path
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        if hasattr(os, "getuid"):
+            info = os.lstat(path)
+            if (not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid()
+                    or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+                raise PermissionError(f"Refusing to use cache directory {path}: it must be a directory "
+                                      "owned by this user and not writable by others (chmod 700).")
+        _trusted_dirs.add(path)
+        return path
+
+
+def _path(key, kind, ext):
+    return os.path.join(_cache_dir(), f"{key}.{kind}.{ext}")
+
+
+def _existing(key, kind, ext):
+    # Path of a cached file, or None if it is missing or the directory is refused.
+    try:
+        path = _path(key, kind, ext)
+    except OSError:
+        return None
+    return path if os.path.exists(path) else None
+
+
+def _size(value):
+    # Rough in-memory footprint; frames count their column buffers.
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(value, pd.DataFrame) else int(usage)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size(item) for item in value.values())
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + _size(vars(value))
+    return sys.getsizeof(value)
+
+
+def _remember(key, kind, value):
+    # LRU bounded by estimated bytes; a value larger than the whole budget is
+    # only kept on disk.
+    global _memory_bytes
+    size = _size(value)
+    with _lock:
+        if (key, kind) in _memory:
+            _memory_bytes -= _memory.pop((key, kind))[1]
+        _memory[(key, kind)] = (value, size)
+        _memory_bytes += size
+        while _memory and _memory_bytes > MAX_MEMORY_BYTES:
+            _memory_bytes -= _memory.popitem(last=False)[1][1]
+
+
+def _recall(key, kind):
+    with _lock:
+        if (key, kind) in _memory:
+            _memory.move_to_end((key, kind))
+            return _memory[(key, kind)][0]
+    return None
+
+
+def _write_atomic(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=_cache_dir(), suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    # The new file is about to be used, so it survives even if it alone is over budget.
+    evict(keep=path)
+
+
+def _touch(path):
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def evict(max_bytes=None, keep=None):
+    # LRU on disk: files are touched on every hit, so the oldest mtime goes first.
+    # keep is counted towards the budget but never removed.
+    max_bytes = MAX_DISK_BYTES if max_bytes is None else max_bytes
+    with _lock:
+        try:
+            names = os.listdir(CACHE_DIR)
+        except FileNotFoundError:
+            return
+        entries = []
+        for name in names:
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def get_frame(key, kind):
+    frame = _recall(key, kind)
+    if frame is not None:
+        return frame
+    path = _existing(key, kind, "parquet")
+    if path is None:
+        return None
+    try:
+        frame = pd.read_parquet(path)
+    except _PERSIST_ERRORS:
+        return None
+    _touch(path)
+    _remember(key, kind, frame)
+    return frame
+
+
+def put_frame(key, kind, frame):
+    _remember(key, kind, frame)
+    try:
+        _write_atomic(_path(key, kind, "parquet"), lambda tmp: frame.to_parquet(tmp, index=False))
+    except _PERSIST_ERRORS:
+        # Still cached in memory for this process, just not across restarts.
+        pass
+    return frame
+
+
+def get_object(key, kind):
+    value = _recall(key, kind)
+    if value is not None:
+        return value
+    path = _existing(key, kind, "pkl")
+    if path is None:
+        return None
+    try:
+        with open(path, "rb") as fh:
+            value = pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    _touch(path)
+    _remember(key, kind, value)
+    return value
+
+
+def put_object(key, kind, value):
+    _remember(key, kind, value)
+
+    def write(tmp):
+        with open(tmp, "wb") as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    try:
+        _write_atomic(_path(key, kind, "pkl"), write)
+    except (OSError, pickle.PicklingError, TypeError, AttributeError):
+        pass
+    return value
+
+
+def cached_frame(key, kind, compute):
+    frame = get_frame(key, kind)
+    if frame is None:
+        frame = put_frame(key, kind, compute())
+    return frame
+
+
+def get_file(key, kind, ext):
+    path = _existing(key, kind, ext)
+    if path is None:
+        return None
+    _touch(path)
+    return path
+
+
+def cached_file(key, kind, ext, write):
+    # For outputs streamed straight to disk: write(tmp_path) fills a temporary
+    # file that is moved into place, and the cached path is returned.
+    path = get_file(key, kind, ext)
+    if path is None:
+        path = _path(key, kind, ext)
+        _write_atomic(path, write)
+    return path
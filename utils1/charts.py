@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from utils1.aggregations import box_stats, histogram_bins
+from utils1.profiling import profiled
+
+# Above this many rows, box plots and histograms are built from server-side
+# statistics (quartiles, whiskers, sampled outliers, bin counts) instead of
+# shipping every value to the browser, so the figure size stops growing with
+# the dataset.
+BINNING_THRESHOLD = int(os.environ.get("CHART_BINNING_THRESHOLD", "20000"))
+
+
+def use_binning(df, binned=None):
+    return len(df) > BINNING_THRESHOLD if binned is None else binned
+
+
+def _box_trace(stats, label_axis, color, orientation='v'):
+    labels = [str(label) for label in stats.index]
+    trace = go.Box(
+        q1=stats['q1'], median=stats['median'], q3=stats['q3'],
+        lowerfence=stats['lowerfence'], upperfence=stats['upperfence'],
+        boxpoints=False, orientation=orientation, marker_color=color, showlegend=False,
+    )
+    trace[label_axis] = labels
+    return trace
+
+
+def _outlier_trace(stats, label_axis, color):
+    labels, values = [], []
+    for label, outliers in zip(stats.index, stats['outliers']):
+        labels.extend([str(label)] * len(outliers))
+        values.extend(outliers)
+    value_axis = 'y' if label_axis == 'x' else 'x'
+    return go.Scatter(mode='markers', marker=dict(color=color, size=4), showlegend=False,
+                      hoverinfo=value_axis, **{label_axis: labels, value_axis: values})
+
+
+@profiled("box figure")
+def box_figure(df, x, y, title, binned=None, color=None):
+    if not use_binning(df, binned):
+        return px.box(df, x=x, y=y, title=title,
+                      color_discrete_sequence=[color] if color else None)
+    stats = box_stats(df, x, y)
+    color = color or px.colors.qualitative.Plotly[0]
+    fig = go.Figure([_box_trace(stats, 'x', color), _outlier_trace(stats, 'x', color)])
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return fig
+
+
+@profiled("histogram figure")
+def histogram_figure(df, x, title, nbins=30, marginal_box=True, binned=None, color=None):
+    if not use_binning(df, binned):
+        return px.histogram(df, x=x, nbins=nbins, marginal="box" if marginal_box else None, title=title,
+                            color_discrete_sequence=[color] if color else None)
+    color = color or px.colors.qualitative.Plotly[0]
+    edges, counts = histogram_bins(df[x], nbins)
+    bars = go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), marker_color=color,
+                  showlegend=False, hovertemplate=f"{x}=%{{x}}<br>count=%{{y}}<extra></extra>")
+    if not marginal_box:
+        fig = go.Figure([bars])
+    else:
+        # Same layout as px.histogram(marginal="box"): a thin box strip above the bars.
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.26, 0.74], vertical_spacing=0.03)
+        stats = box_stats(df, None, x)
+        fig.add_trace(_box_trace(stats, 'y', color, orientation='h'), row=1, col=1)
+        fig.add_trace(_outlier_trace(stats, 'y', color), row=1, col=1)
+        fig.add_trace(bars, row=2, col=1)
+        fig.update_yaxes(showticklabels=False, row=1, col=1)
+    fig.update_layout(title=title, bargap=0)
+    fig.update_xaxes(title_text=x, row=2 if marginal_box else None, col=1 if marginal_box else None)
+    fig.update_yaxes(title_text="count", row=2 if marginal_box else None, col=1 if marginal_box else None)
+    return fig
@@ -0,0 +1,250 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from utils1.backends import get_backend
+from utils1.dtypes import memory_breakdown, optimize_dtypes
+from utils1.duplicates import DEFAULT_DUPLICATE_KEYS, DuplicateTracker
+from utils1.profiling import profiled
+from utils1.time_index import sort_by_created
+
+# Source columns the cleaning pipeline and the analysis tabs read; everything
+# else in an export is only ever displayed.
+TIMEDELTA_COLUMNS = ['SLA resolution time', 'SLA response time', 'On Hold Duration',
+                     'Response time elapsed', 'Time Elapsed']
+DATETIME_COLUMNS = ['Created Time', 'Resolved Time']
+BOOL_COLUMNS = ['FCR', 'VIP User', 'ReOpened', 'First Response Overdue Status', 'Overdue Status']
+TEXT_COLUMNS = ['Technician', 'Department', 'Site', 'Category', 'Priority', 'Request Status']
+ID_COLUMNS = ['Request ID']
+ANALYSIS_COLUMNS = ID_COLUMNS + DATETIME_COLUMNS + TIMEDELTA_COLUMNS + BOOL_COLUMNS + TEXT_COLUMNS
+
+# Bump when the cleaned output changes shape or order, so cached frames from an
+# older pipeline are not reused.
+CLEANING_VERSION = 5
+
+MAX_NULL_FRACTION = 0.5
+# Kept however empty: a blank hold duration means the ticket was never on hold.
+KEEP_SPARSE_COLUMNS = ['resolution_time', 'on_hold_duration']
+SAMPLE_ROWS = 5
+
+# Tried in order against a sample of each text datetime column; day-first
+# layouts come first because that is how the exports are written.
+DATETIME_FORMATS = [
+    "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %I:%M %p", "%d/%m/%Y %I:%M:%S %p",
+    "%d-%m-%Y %H:%M", "%d-%m-%Y %H:%M:%S", "%d/%m/%Y", "%d-%m-%Y",
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d",
+    "%d %b %Y %H:%M", "%d %b %Y %H:%M:%S", "%b %d, %Y %I:%M %p", "%b %d, %Y %H:%M",
+]
+FORMAT_SAMPLE_ROWS = 1000
+# A format is accepted if it parses this share of the sample; the stragglers
+# are junk that would coerce to NaT under any format.
+FORMAT_MIN_MATCH = 0.95
+MIXED_FORMAT = "mixed"
+DISTINCT_PARSE_RATIO = 0.5
+
+_BOOL_TEXT = {'true': True, 'false': False, 'yes': True, 'no': False}
+
+
+@dataclass
+class CleaningReport:
+    rows_before: int
+    columns_before: int
+    dtypes_before: pd.Series
+    missing_before: pd.Series
+    sample_before: pd.DataFrame
+    duplicate_count: int
+    duplicate_sample: pd.DataFrame
+    rows_after: int = 0
+    columns_after: int = 0
+    missing_after: pd.Series = None
+    sample_after: pd.DataFrame = None
+    dropped_columns: list = field(default_factory=list)
+    formats: dict = field(default_factory=dict)
+    memory: pd.DataFrame = None
+    duplicate_keys: list = None
+    duplicates_dropped: int = 0
+
+
+def source_name(col):
+    # Export headers as the column lists above spell them; exports often pad them.
+    return str(col).strip()
+
+
+def normalize_column_name(col):
+    return col.strip().lower().replace(" ", "_")
+
+
+def _text_values(series):
+    kind = pd.api.types.infer_dtype(series, skipna=True)
+    if kind == 'string':
+        return series.dropna()
+    if kind == 'mixed':
+        return series[series.str.len().notna()]
+    return series.iloc[:0]
+
+
+def _detect_datetime_format(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return None
+    sample = _text_values(series).head(FORMAT_SAMPLE_ROWS).str.strip()
+    if sample.empty:
+        return None
+    for fmt in DATETIME_FORMATS:
+        if pd.to_datetime(sample, format=fmt, errors='coerce').notna().mean() >= FORMAT_MIN_MATCH:
+            return fmt
+    return MIXED_FORMAT
+
+
+@profiled("detect formats")
+def detect_formats(df, formats=None):
+    # Only columns without a known format are sampled, so the chunked loader can
+    # pass the first chunk's result back in and skip detection from then on.
+    formats = dict(formats or {})
+    for col in df.columns:
+        name = source_name(col)
+        if name in DATETIME_COLUMNS and formats.get(name) is None:
+            formats[name] = _detect_datetime_format(df[col])
+    return formats
+
+
+def _parse_distinct(series, parse):
+    # Exports repeat the same timestamps and durations many times over, so each
+    # distinct value is parsed once and the results are broadcast back by code.
+    codes, uniques = pd.factorize(series)
+    if len(uniques) > DISTINCT_PARSE_RATIO * len(series):
+        return parse(series)
+    parsed = parse(pd.Series(uniques, dtype=series.dtype))
+    values = np.append(parsed.to_numpy(), parsed.iloc[:0].reindex([0]).to_numpy())
+    return pd.Series(values[codes], index=series.index, name=series.name)
+
+
+def _parse_datetime(series, fmt):
+    if fmt is None or fmt == MIXED_FORMAT:
+        if pd.api.types.infer_dtype(series, skipna=True) in ('datetime', 'datetime64', 'date'):
+            return pd.to_datetime(series, errors='coerce')
+        return pd.to_datetime(series, errors='coerce', dayfirst=True, format=MIXED_FORMAT)
+    if pd.api.types.infer_dtype(series, skipna=True) == 'string':
+        return get_backend().parse_datetime(series, fmt)
+    if not (series.dtype == object or pd.api.types.is_string_dtype(series)):
+        # No text at all, e.g. a CSV chunk whose cells are all blank (read as float).
+        return pd.to_datetime(series, errors='coerce')
+    # Excel hands back real date cells as datetime objects next to text cells;
+    # each group is converted in a single call and the results merged.
+    is_text = series.str.len().notna()
+    parsed = get_backend().parse_datetime(series.where(is_text), fmt)
+    native = pd.to_datetime(series.where(~is_text), errors='coerce')
+    return parsed.fillna(native)
+
+
+def _to_datetime(series, fmt):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return _parse_distinct(series, lambda values: _parse_datetime(values, fmt))
+
+
+def _to_timedelta(series):
+    if pd.api.types.is_timedelta64_dtype(series):
+        return series
+    return _parse_distinct(series, lambda values: pd.to_timedelta(values, errors='coerce'))
+
+
+def _to_bool(series):
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    # Map the handful of distinct spellings instead of lower-casing every row.
+    codes, uniques = pd.factorize(series)
+    lookup = np.array([_BOOL_TEXT.get(str(value).strip().lower(), np.nan) for value in uniques] + [np.nan],
+                      dtype=object)
+    return pd.Series(lookup[codes], index=series.index, name=series.name).infer_objects()
+
+
+@profiled("convert")
+def convert_chunk(df, formats=None):
+    # Row-local steps only, so this gives the same result on a whole frame or on
+    # any slice of it; column pruning happens afterwards in drop_sparse_columns.
+    df = df.copy(deep=False)
+    df.columns = [source_name(col) for col in df.columns]
+    if formats is None:
+        formats = detect_formats(df)
+
+    for col in TIMEDELTA_COLUMNS:
+        if col in df.columns:
+            df[col] = _to_timedelta(df[col])
+
+    for col in DATETIME_COLUMNS:
+        if col in df.columns:
+            df[col] = _to_datetime(df[col], formats.get(col))
+
+    for col in BOOL_COLUMNS:
+        if col in df.columns:
+            df[col] = _to_bool(df[col])
+
+    if 'Created Time' in df.columns:
+        df['Month'] = df['Created Time'].dt.to_period('M')
+
+    df.columns = [normalize_column_name(col) for col in df.columns]
+
+    if 'request_status' in df.columns:
+        status = df['request_status']
+        df['request_status'] = status.astype(str).str.strip().str.lower().where(status.notna())
+
+    if 'created_time' in df.columns and 'resolved_time' in df.columns:
+        df['resolution_time'] = (df['resolved_time'] - df['created_time']).dt.total_seconds() / 3600
+
+    return df
+
+
+def drop_sparse_columns(df, null_counts=None, total_rows=None):
+    if null_counts is None:
+        null_counts = df.isnull().sum()
+    if total_rows is None:
+        total_rows = len(df)
+    if total_rows == 0:
+        return df
+    keep = [col for col in df.columns
+            if col in KEEP_SPARSE_COLUMNS or null_counts.get(col, 0) / total_rows <= MAX_NULL_FRACTION]
+    return df[keep]
+
+
+def start_report(df, duplicates):
+    return CleaningReport(
+        rows_before=df.shape[0],
+        columns_before=df.shape[1],
+        dtypes_before=df.dtypes,
+        missing_before=df.isnull().sum(),
+        sample_before=df.head(SAMPLE_ROWS),
+        duplicate_count=duplicates.count,
+        duplicate_sample=duplicates.sample(),
+        duplicate_keys=duplicates.matched_on,
+    )
+
+
+def finish_report(report, df, null_counts, formats):
+    report.rows_after = df.shape[0]
+    report.columns_after = df.shape[1]
+    added = [col for col in df.columns if col not in null_counts.index]
+    report.missing_after = pd.concat([null_counts, df[added].isnull().sum()]).reindex(df.columns).astype(int)
+    report.sample_after = df.head(SAMPLE_ROWS)
+    report.dropped_columns = [col for col in null_counts.index if col not in df.columns]
+    report.formats = formats
+    return report
+
+
+@profiled("clean")
+def clean_tickets(df, duplicate_keys=DEFAULT_DUPLICATE_KEYS, drop_duplicates=False):
+    # Pure pipeline stage: the input frame is left untouched and everything the
+    # cleaning tab shows comes back in the report.
+    duplicates = DuplicateTracker(duplicate_keys)
+    duplicated = duplicates.update(df)
+    report = start_report(df, duplicates)
+    if drop_duplicates and duplicates.count:
+        df = df[~duplicated]
+        report.duplicates_dropped = duplicates.count
+    formats = detect_formats(df)
+    df = convert_chunk(df, formats)
+    null_counts = df.isnull().sum()
+    df = sort_by_created(drop_sparse_columns(df, null_counts))
+    optimized = optimize_dtypes(df)
+    report.memory = memory_breakdown(df, optimized)
+    return optimized, finish_report(report, optimized, null_counts, formats)
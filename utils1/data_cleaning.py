@@ -1,64 +1,76 @@
 import pandas as pd
 import streamlit as st
 
-def data_cleaning(df, uploaded_file):
+from utils1.profiling import profiled
+from utils1.table_view import ALL_COLUMNS, PAGE_SIZES, page_count, page_frame, view_positions
+
+@st.fragment
+def paged_table(frame, frame_key, key):
+    # Filtering, sorting and paging happen here; only the visible page is sent to the browser.
+    columns = list(frame.columns)
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    text = col1.text_input("Filter rows containing", key=f"{key}_filter")
+    filter_column = col2.selectbox("In column", [ALL_COLUMNS] + columns, key=f"{key}_filter_column",
+                                   format_func=lambda col: "All columns" if col is ALL_COLUMNS else str(col))
+    sort_by = col3.selectbox("Sort by", [None] + columns, key=f"{key}_sort",
+                             format_func=lambda col: "Original order" if col is None else str(col))
+    ascending = col4.radio("Order", ("Asc", "Desc"), key=f"{key}_order") == "Asc"
+
+    positions = view_positions(frame, frame_key, text, filter_column, sort_by, ascending)
+    col1, col2, col3 = st.columns([1, 1, 3])
+    page_size = col1.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    pages = page_count(len(positions), page_size)
+    page = min(int(col2.number_input("Page", min_value=1, step=1, key=f"{key}_page")), pages)
+    col3.caption(f"{len(positions):,} of {len(frame):,} rows · page {page} of {pages}")
+    st.dataframe(page_frame(frame, positions, page, page_size))
+
+
+@profiled("cleaning tab")
+def data_cleaning(report, df, raw_df, dataset_key):
+        # Rendering only: the cleaning itself happens in utils1.cleaning.clean_tickets.
         st.success("✅ File successfully loaded!")
         st.subheader("🔍 Before Cleaning")
         col1, col2 = st.columns(2)
-        col1.metric("Number of Rows", df.shape[0])
-        col2.metric("Number of Columns", df.shape[1])
-         
+        col1.metric("Number of Rows", report.rows_before)
+        col2.metric("Number of Columns", report.columns_before)
+
         st.write("**Column Data Types:**")
-        st.write(df.dtypes)
+        st.write(report.dtypes_before)
         st.write("**Missing Values:**")
-        st.write(df.isnull().sum())
+        st.write(report.missing_before)
         st.write("**Sample Data:**")
-        st.dataframe(df.head())
-
-        duplicate_rows = df[df.duplicated()]
-        st.write(f"🔁 **Duplicate Rows Found:** {duplicate_rows.shape[0]}")
-        if not duplicate_rows.empty:
-            st.dataframe(duplicate_rows)
-
-        for col in ['SLA resolution time', 'SLA response time', 'On Hold Duration']:
-            if col in df.columns:
-                df[col] = pd.to_timedelta(df[col], errors='coerce')
+        st.dataframe(report.sample_before)
 
-        for col in ['Created Time', 'Resolved Time']:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
+        matched_on = ", ".join(report.duplicate_keys) if report.duplicate_keys else "entire row"
+        st.write(f"🔁 **Duplicate Rows Found:** {report.duplicate_count} (matched on {matched_on})")
+        if report.duplicates_dropped:
+            st.caption(f"{report.duplicates_dropped} duplicates were dropped; the first occurrence of each was kept.")
+        if report.duplicate_count:
+            if report.duplicate_count > len(report.duplicate_sample):
+                st.caption(f"Showing the first {len(report.duplicate_sample)} duplicates.")
+            st.dataframe(report.duplicate_sample)
 
-        for col in ['Response time elapsed', 'Time Elapsed']:
-            if col in df.columns:
-                df[col] = pd.to_timedelta(df[col], errors='coerce')
-
-        bool_cols = ['FCR', 'VIP User', 'ReOpened', 'First Response Overdue Status', 'Overdue Status']
-        for col in bool_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.lower().map({'true': True, 'false': False, 'yes': True, 'no': False})
-
-        if 'Created Time' in df.columns:
-            df['Month'] = df['Created Time'].dt.to_period('M')
-
-        df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
-        df = df.loc[:, df.isnull().mean() <= 0.5]
-
-        if 'request_status' in df.columns:
-            df['request_status'] = df['request_status'].astype(str).str.strip().str.lower()
-            df['resolved_time'] = pd.to_datetime(df['resolved_time'], errors='coerce')
-            df.loc[(df['request_status'] == 'onhold') & (df['resolved_time'].isna()), 'resolved_time'] = pd.NaT
-
-        df['created_time'] = pd.to_datetime(df['created_time'], errors='coerce')
-        df['resolved_time'] = pd.to_datetime(df['resolved_time'], errors='coerce')
-        df['resolution_time'] = (df['resolved_time'] - df['created_time']).dt.total_seconds() / 3600
+        if report.formats:
+            st.write("**Detected Datetime Formats:**")
+            st.write(pd.Series({col: fmt or "native" for col, fmt in report.formats.items()}, name="format"))
 
         st.subheader("🧼 After Cleaning Overview")
-        st.write(f"**Number of Rows:** {df.shape[0]}")
-        st.write(f"**Number of Columns:** {df.shape[1]}")
+        st.write(f"**Number of Rows:** {report.rows_after}")
+        st.write(f"**Number of Columns:** {report.columns_after}")
+        if report.dropped_columns:
+            st.write(f"**Dropped (mostly empty) Columns:** {', '.join(report.dropped_columns)}")
         st.write("**Missing Values:**")
-        st.write(df.isnull().sum())
+        st.write(report.missing_after)
         st.write("**Sample Cleaned Data:**")
-        st.dataframe(df.head())
+        st.dataframe(report.sample_after)
+
+        if report.memory is not None:
+            before_mb = report.memory['before_bytes'].sum() / 1024 ** 2
+            after_mb = report.memory['after_bytes'].sum() / 1024 ** 2
+            st.write(f"**In-Memory Size:** {before_mb:.1f} MB → {after_mb:.1f} MB "
+                     f"({before_mb / max(after_mb, 1e-9):.1f}x smaller)")
+            with st.expander("📦 Memory usage by column"):
+                st.dataframe(report.memory)
 
         st.subheader("🔍 Compare Full Raw vs Cleaned Data")
 
@@ -66,11 +78,10 @@ def data_cleaning(df, uploaded_file):
 
         with st.expander("🔎 Click to view full table"):
             if view_option == "Raw Data":
-                raw_df = pd.read_excel(uploaded_file, engine='openpyxl')
                 st.markdown("### 🗃️ Raw Data (Full Table)")
-                st.dataframe(raw_df)
+                paged_table(raw_df, f"{dataset_key}-raw", "raw_table")
             else:
                 st.markdown("### 🧼 Cleaned Data (Full Table)")
-                st.dataframe(df)
+                paged_table(df, f"{dataset_key}-cleaned", "cleaned_table")
 
         return df
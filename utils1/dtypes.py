@@ -0,0 +1,60 @@
+import pandas as pd
+
+from utils1.profiling import profiled
+
+# Compact dtypes for the cleaned ticket frame: repetitive text as categoricals,
+# flags as nullable booleans, downcast numbers, and the derived time keys the
+# tabs group on stored once as small integer codes.
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+DERIVED_COLUMNS = ['created_month_key', 'created_hour']
+
+
+def add_time_keys(df):
+    if 'created_time' not in df.columns:
+        return df
+    created = df['created_time']
+    # Months since year 0, so keys sort chronologically and decode with divmod.
+    df['created_month_key'] = (created.dt.year * 12 + created.dt.month - 1).astype('Int32')
+    df['created_hour'] = created.dt.hour.astype('Int8')
+    return df
+
+
+def month_label(key):
+    year, month = divmod(int(key), 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+def _optimized(series):
+    if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_float_dtype(series):
+        return pd.to_numeric(series, downcast='float')
+    if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        kind = pd.api.types.infer_dtype(series, skipna=True)
+        if kind == 'boolean':
+            return series.astype('boolean')
+        if kind == 'string' and len(series) and series.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(series):
+            return series.astype('category')
+    return series
+
+
+@profiled("optimize dtypes")
+def optimize_dtypes(df):
+    df = df.copy(deep=False)
+    for col in df.columns:
+        if col not in DERIVED_COLUMNS:
+            df[col] = _optimized(df[col])
+    return add_time_keys(df)
+
+
+def memory_breakdown(before, after):
+    # Deep per-column bytes; columns only present on one side show 0 on the other.
+    usage = pd.DataFrame({
+        'before_bytes': before.memory_usage(deep=True, index=False),
+        'after_bytes': after.memory_usage(deep=True, index=False),
+    }).fillna(0).astype('int64')
+    usage['dtype_before'] = before.dtypes.astype(str)
+    usage['dtype_after'] = after.dtypes.astype(str)
+    return usage
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from utils1.profiling import profiled
+
+# Duplicates are found by hashing a few key columns per row rather than comparing
+# every column, so a ticket re-exported with a changed "Time Elapsed" still
+# matches its earlier copy. The first occurrence is kept. A row with a blank key
+# identifies nothing, so it is never matched.
+DEFAULT_DUPLICATE_KEYS = ['Request ID']
+DUPLICATE_SAMPLE_ROWS = 100
+
+
+def resolve_keys(columns, keys):
+    # Headers are matched after stripping. None, or a key this export lacks,
+    # falls back to comparing whole rows.
+    if not keys:
+        return None
+    by_name = {str(col).strip(): col for col in columns}
+    if any(key.strip() not in by_name for key in keys):
+        return None
+    return [by_name[key.strip()] for key in keys]
+
+
+def row_hashes(df, keys=None):
+    # 64-bit per-row hashes; a collision would need billions of distinct keys.
+    return pd.util.hash_pandas_object(df if keys is None else df[keys], index=False).to_numpy()
+
+
+def keyed_rows(df, keys):
+    # Rows with every key column filled in; whitespace-only text counts as blank.
+    mask = np.ones(len(df), dtype=bool)
+    for key in keys:
+        values = df[key]
+        filled = values.notna()
+        if values.dtype == object or pd.api.types.is_string_dtype(values):
+            filled &= values.astype(str).str.strip() != ''
+        mask &= filled.to_numpy()
+    return mask
+
+
+class DuplicateTracker:
+    # Feed chunks in file order; a row is a duplicate if its key hash was seen
+    # earlier in the same chunk or in any previous one. Only the hashes and a
+    # bounded sample of duplicate rows are kept.
+    def __init__(self, keys=DEFAULT_DUPLICATE_KEYS, sample_rows=DUPLICATE_SAMPLE_ROWS):
+        self.keys = keys
+        self.sample_rows = sample_rows
+        self.columns = None
+        self.rows = 0
+        self.count = 0
+        self._seen = np.empty(0, dtype=np.uint64)
+        self._samples = []
+        self._sampled = 0
+
+    @property
+    def matched_on(self):
+        # The stripped key names actually used, or None for whole rows.
+        return None if self.columns is None else [str(col).strip() for col in self.columns]
+
+    @profiled("duplicates")
+    def update(self, chunk):
+        if self.rows == 0:
+            self.columns = resolve_keys(chunk.columns, self.keys)
+        self.rows += len(chunk)
+        hashes = row_hashes(chunk, self.columns)
+        duplicated = pd.Series(hashes).duplicated().to_numpy()
+        if len(self._seen):
+            pos = np.minimum(np.searchsorted(self._seen, hashes), len(self._seen) - 1)
+            duplicated = duplicated | (self._seen[pos] == hashes)
+        if self.columns is not None:
+            keyed = keyed_rows(chunk, self.columns)
+            duplicated = duplicated & keyed
+            hashes = hashes[keyed]
+        self._seen = np.union1d(self._seen, hashes)
+
+        found = int(duplicated.sum())
+        self.count += found
+        room = self.sample_rows - self._sampled
+        if found and room > 0:
+            self._samples.append(chunk[duplicated].head(room))
+            self._sampled += len(self._samples[-1])
+        return duplicated
+
+    def sample(self):
+        if not self._samples:
+            return pd.DataFrame()
+        return pd.concat(self._samples)
@@ -0,0 +1,101 @@
+import streamlit as st
+
+from utils1.aggregations import get_summaries
+from utils1.jobs import CANCELLED, DONE, FAILED, FINISHED, QUEUED, cancel_job, get_job, submit_report
+from utils1.pdf_preview import build_report, cached_report_path, cached_thumbnails
+from utils1.profiling import profiled
+from utils1.writers import EXPORT_FORMATS, XLSX_MAX_ROWS, cached_export
+
+PROGRESS_POLL_SECONDS = 1.0
+
+
+@st.fragment(run_every=PROGRESS_POLL_SECONDS)
+def report_progress(job_id):
+    # Polls the job while it runs; once it ends the whole app reruns so the
+    # export section can show the preview (or the error).
+    job = get_job(job_id)
+    if job is None or job.status in FINISHED:
+        st.rerun()
+    if job.cancel_requested:
+        text = "Cancelling…"
+    elif job.status == QUEUED:
+        text = "Waiting for a free report worker…"
+    else:
+        text = f"Rendering charts: {job.done} of {job.total or '?'}" + (f" ({job.current})" if job.current else "")
+    st.progress(job.fraction, text=text)
+    if st.button("✖️ Cancel", key=f"cancel_{job_id}", disabled=job.cancel_requested):
+        cancel_job(job_id)
+        st.rerun()
+
+
+@st.fragment
+@profiled("export tab")
+def export_section(df, dataset_key):
+    # A fragment: choosing a chart style or generating the PDF reruns only this section.
+    st.subheader("📅 Download Cleaned Dataset")
+
+    # Nothing is written until the button is clicked; the file is then built in
+    # chunks on disk and reused for this dataset until the cache evicts it.
+    fmt = st.selectbox("Format", list(EXPORT_FORMATS), format_func=lambda name: EXPORT_FORMATS[name][0],
+                       key="export_format")
+    label, mime = EXPORT_FORMATS[fmt]
+    if fmt == 'xlsx' and len(df) > XLSX_MAX_ROWS:
+        st.warning(f"Excel sheets hold at most {XLSX_MAX_ROWS:,} rows; choose CSV or Parquet for this dataset.")
+    else:
+        def build():
+            with open(cached_export(df, dataset_key, fmt), 'rb') as fh:
+                return fh.read()
+
+        st.download_button(f"📅 Download {label}", build, file_name=f"cleaned_file.{fmt}", mime=mime)
+
+    st.subheader("📄 Export PDF Report")
+
+    chart_style = st.radio("Chart rendering:", ("Raster (Plotly)", "Vector (ReportLab)"), horizontal=True,
+                           help="Vector charts are drawn natively: faster, smaller and sharp when zoomed.")
+    report_backend = "vector" if chart_style.startswith("Vector") else "plotly"
+
+    # Reports are built by the shared job queue (utils1.jobs); this session only
+    # remembers which job it is waiting on.
+    pdf_path = cached_report_path(dataset_key, report_backend)
+    session_jobs = st.session_state.setdefault("report_jobs", {})
+    job = get_job(session_jobs.get((dataset_key, report_backend)))
+    if pdf_path is None:
+        if job is not None and job.status not in FINISHED:
+            report_progress(job.id)
+        else:
+            if job is not None and job.status == FAILED:
+                st.error(f"⚠️ Report generation failed: {job.error}")
+            elif job is not None and job.status == CANCELLED:
+                st.info("Report generation was cancelled.")
+            if st.button("📄 Generate PDF Report"):
+                job = submit_report(df, get_summaries(df, dataset_key), dataset_key, report_backend)
+                session_jobs[(dataset_key, report_backend)] = job.id
+                if job.status == DONE:
+                    pdf_path = job.path
+                else:
+                    report_progress(job.id)
+    elif job is not None and job.status == DONE:
+        st.success("✅ PDF report generated.")
+
+    if pdf_path is not None:
+        # Thumbnails of the first pages only; the full PDF is read on download.
+        thumbnails, total_pages = cached_thumbnails(pdf_path)
+        st.markdown("### 📄 Preview PDF")
+        columns = st.columns(len(thumbnails) or 1)
+        for number, (column, png) in enumerate(zip(columns, thumbnails), start=1):
+            column.image(png, caption=f"Page {number}")
+        if total_pages > len(thumbnails):
+            st.caption(f"Showing {len(thumbnails)} of {total_pages} pages. Download the report for the rest.")
+
+        def read_pdf():
+            # Rebuilt only if the cache evicted it since the preview was drawn.
+            path = build_report(df, get_summaries(df, dataset_key), dataset_key, report_backend)
+            with open(path, 'rb') as fh:
+                return fh.read()
+
+        st.download_button(
+            label="⬇️ Download PDF",
+            data=read_pdf,
+            file_name="ticket_report.pdf",
+            mime="application/pdf"
+        )
@@ -0,0 +1,128 @@
+import os
+
+import pandas as pd
+
+from utils1.cleaning import ANALYSIS_COLUMNS, convert_chunk, detect_formats, drop_sparse_columns
+from utils1.dtypes import optimize_dtypes
+from utils1.profiling import profiled
+from utils1.time_index import sort_by_created
+
+SUPPORTED_TYPES = ["xlsx", "csv", "parquet"]
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+def file_type(source, file_name=None):
+    name = file_name or getattr(source, "name", None) or os.fspath(source)
+    ext = os.path.splitext(str(name))[1].lower().lstrip(".")
+    if ext not in SUPPORTED_TYPES:
+        raise ValueError(f"Unsupported file type '{ext}'. Expected one of: {', '.join(SUPPORTED_TYPES)}")
+    return ext
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def _wanted(columns):
+    # Headers are matched after stripping, since exports often pad them with spaces.
+    return None if columns is None else {col.strip() for col in columns}
+
+
+def _iter_xlsx(source, columns, chunk_rows):
+    from openpyxl import load_workbook
+
+    wanted = _wanted(columns)
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        # The first sheet, as pd.read_excel reads it; the active one is whichever tab was last selected.
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        picked = [(i, name) for i, name in enumerate(header)
+                  if name is not None and (wanted is None or str(name).strip() in wanted)]
+        indices = [i for i, _ in picked]
+        names = [str(name) for _, name in picked]
+
+        batch = []
+        for row in rows:
+            values = [row[i] if i < len(row) else None for i in indices]
+            if all(value is None for value in values):
+                continue
+            batch.append(values)
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=names)
+                batch = []
+        if batch or not names:
+            yield pd.DataFrame(batch, columns=names)
+    finally:
+        wb.close()
+
+
+def _iter_csv(source, columns, chunk_rows):
+    wanted = _wanted(columns)
+    usecols = None if wanted is None else (lambda name: name.strip() in wanted)
+    yield from pd.read_csv(source, usecols=usecols, chunksize=chunk_rows)
+
+
+def _iter_parquet(source, columns, chunk_rows):
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(source)
+    wanted = _wanted(columns)
+    names = None if wanted is None else [name for name in parquet_file.schema_arrow.names
+                                         if name.strip() in wanted]
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=names):
+        yield batch.to_pandas()
+
+
+_READERS = {"xlsx": _iter_xlsx, "csv": _iter_csv, "parquet": _iter_parquet}
+
+
+def iter_chunks(source, file_name=None, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Streams the export in frames of at most chunk_rows rows; with columns given,
+    # every other column is skipped by the reader rather than parsed and dropped.
+    reader = _READERS[file_type(source, file_name)]
+    _rewind(source)
+    yield from reader(source, columns, chunk_rows)
+
+
+@profiled("read")
+def read_frame(source, file_name=None, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    chunks = list(iter_chunks(source, file_name, columns, chunk_rows))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
+
+@profiled("load_cleaned")
+def load_cleaned(source, file_name=None, chunk_rows=DEFAULT_CHUNK_ROWS, duplicates=None, drop_duplicates=False):
+    # Each chunk is cleaned as soon as it is read, so only the compact cleaned
+    # rows accumulate. Datetime formats are detected on the first chunk that has
+    # values and reused; the sparse-column rule needs whole-file null counts and
+    # is applied once at the end. Pass a DuplicateTracker as duplicates to count
+    # (and optionally drop) duplicate keys across chunks; whole-row matching then
+    # only compares the analysed columns.
+    columns = ANALYSIS_COLUMNS
+    if duplicates is not None and duplicates.keys:
+        columns = columns + [key for key in duplicates.keys if key not in columns]
+    cleaned = []
+    formats = None
+    null_counts = None
+    total_rows = 0
+    for chunk in iter_chunks(source, file_name, columns, chunk_rows):
+        if duplicates is not None:
+            duplicated = duplicates.update(chunk)
+            if drop_duplicates:
+                chunk = chunk[~duplicated]
+        formats = detect_formats(chunk, formats)
+        chunk = convert_chunk(chunk, formats)
+        counts = chunk.isnull().sum()
+        null_counts = counts if null_counts is None else null_counts.add(counts, fill_value=0)
+        total_rows += len(chunk)
+        cleaned.append(chunk)
+    if not cleaned:
+        return pd.DataFrame()
+    df = pd.concat(cleaned, ignore_index=True)
+    return optimize_dtypes(sort_by_created(drop_sparse_columns(df, null_counts, total_rows)))
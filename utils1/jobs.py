@@ -0,0 +1,140 @@
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from utils1.pdf_preview import build_report, cached_report_path, report_key
+
+# PDF reports are built on a small shared worker pool instead of the script
+# thread that asked for them. A job is identified by the report it produces
+# (dataset, date range, chart backend), so sessions asking for the same report
+# while it is queued or running share one job, and a finished report is served
+# from the file cache without a job at all.
+REPORT_JOB_WORKERS = int(os.environ.get("REPORT_JOB_WORKERS", "2"))
+MAX_FINISHED_JOBS = 64
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+_ids = itertools.count(1)
+_jobs = OrderedDict()  # job id -> ReportJob, oldest first
+_active = {}  # report identity -> job id while queued or running
+_lock = threading.Lock()
+_pool = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@dataclass
+class ReportJob:
+    id: str
+    identity: tuple
+    status: str = QUEUED
+    done: int = 0
+    total: int = 0
+    current: str = ""
+    path: str = None
+    error: str = None
+    submitted: float = field(default_factory=time.time)
+    finished: float = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def fraction(self):
+        return self.done / self.total if self.total else 0.0
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+
+def _executor():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, REPORT_JOB_WORKERS), thread_name_prefix="report-job")
+        return _pool
+
+
+def _forget_finished():
+    # Caller holds _lock.
+    finished = [job_id for job_id, job in _jobs.items() if job.status in FINISHED]
+    for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del _jobs[job_id]
+
+
+def _finish(job, status, error=None):
+    with _lock:
+        job.status, job.error, job.finished = status, error, time.time()
+        if _active.get(job.identity) == job.id:
+            del _active[job.identity]
+        _forget_finished()
+
+
+def _run(job, df, summaries, dataset_key, backend, start, end):
+    if job._cancel.is_set():
+        _finish(job, CANCELLED)
+        return
+
+    def progress(done, total, title):
+        if job._cancel.is_set():
+            raise JobCancelled()
+        job.done, job.total, job.current = done, total, title
+
+    job.status = RUNNING
+    try:
+        job.path = build_report(df, summaries, dataset_key, backend, start, end, progress=progress)
+    except JobCancelled:
+        _finish(job, CANCELLED)
+    except Exception as exc:
+        _finish(job, FAILED, f"{type(exc).__name__}: {exc}")
+    else:
+        job.done = job.total
+        _finish(job, DONE)
+
+
+def submit_report(df, summaries, dataset_key, backend, start=None, end=None):
+    # Returns the job building this report: an existing one if the same report
+    # is already queued or running, or an already-finished job if it is cached.
+    # df and summaries must be what dataset_key and the range describe.
+    identity = (report_key(dataset_key, start, end), backend)
+    with _lock:
+        job_id = _active.get(identity)
+        if job_id is not None:
+            return _jobs[job_id]
+        job = ReportJob(id=f"report-{next(_ids)}", identity=identity)
+        _jobs[job.id] = job
+        path = cached_report_path(dataset_key, backend, start, end)
+        if path is not None:
+            job.status, job.path, job.finished = DONE, path, time.time()
+            _forget_finished()
+            return job
+        _active[identity] = job.id
+    _executor().submit(_run, job, df, summaries, dataset_key, backend, start, end)
+    return job
+
+
+def get_job(job_id):
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def cancel_job(job_id):
+    # A queued job never starts; a running one stops at its next chart. Other
+    # sessions sharing the job see it cancelled too, and a new request for the
+    # same report starts a fresh job straight away.
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return False
+        job._cancel.set()
+        if _active.get(job.identity) == job.id:
+            del _active[job.identity]
+        if job.status == QUEUED:
+            job.status, job.finished = CANCELLED, time.time()
+    return True
@@ -0,0 +1,178 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+from reportlab.graphics import renderPDF
+from reportlab.graphics.charts.axes import XValueAxis, YValueAxis
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.shapes import Circle, Drawing, Line, Rect, String
+from reportlab.graphics.widgets.markers import makeMarker
+from reportlab.lib import colors
+
+# Vector versions of the report charts, drawn straight onto the ReportLab canvas
+# from pre-aggregated data instead of going through Plotly and kaleido.
+
+# Plotly's sequential Teal scale, so both backends share a look.
+TEAL = ['#d1eeea', '#a8dbd9', '#85c4c9', '#68abb8', '#4f90a6', '#3b738f', '#2a5674']
+PRIMARY = colors.HexColor('#4f90a6')
+OUTLIER = colors.HexColor('#2a5674')
+
+PLOT_LEFT = 55
+PLOT_BOTTOM = 60
+PLOT_RIGHT_PAD = 15
+TITLE_SPACE = 30
+MAX_LABEL_CHARS = 14
+
+
+@dataclass
+class ChartSpec:
+    # kind: 'bar' and 'line' use labels/values, 'histogram' uses edges/counts,
+    # 'box' uses a box_stats() frame.
+    kind: str
+    title: str
+    labels: list = field(default_factory=list)
+    values: list = field(default_factory=list)
+    edges: np.ndarray = None
+    counts: np.ndarray = None
+    stats: object = None
+
+
+def _short(label):
+    label = str(label)
+    return label if len(label) <= MAX_LABEL_CHARS else label[:MAX_LABEL_CHARS - 1] + "…"
+
+
+def _scale_color(value, vmin, vmax):
+    if vmax <= vmin:
+        return colors.HexColor(TEAL[-1])
+    pos = (value - vmin) / (vmax - vmin)
+    return colors.HexColor(TEAL[min(int(pos * len(TEAL)), len(TEAL) - 1)])
+
+
+def _plot_area(width, height):
+    return PLOT_LEFT, PLOT_BOTTOM, width - PLOT_LEFT - PLOT_RIGHT_PAD, height - PLOT_BOTTOM - TITLE_SPACE
+
+
+def _drawing(spec, width, height):
+    drawing = Drawing(width, height)
+    drawing.add(String(PLOT_LEFT, height - 18, spec.title, fontName="Helvetica-Bold", fontSize=11))
+    return drawing
+
+
+def _value_axis(x, y, length, vmin, vmax):
+    axis = YValueAxis()
+    axis.setPosition(x, y, length)
+    axis.valueMin = vmin
+    axis.valueMax = vmax
+    axis.labels.fontName = "Helvetica"
+    axis.labels.fontSize = 7
+    axis.configure([(vmin, vmax)])
+    return axis
+
+
+def _bar(spec, width, height):
+    drawing = _drawing(spec, width, height)
+    x, y, w, h = _plot_area(width, height)
+    chart = VerticalBarChart()
+    chart.x, chart.y, chart.width, chart.height = x, y, w, h
+    chart.data = [list(spec.values)]
+    chart.categoryAxis.categoryNames = [_short(label) for label in spec.labels]
+    chart.categoryAxis.labels.angle = 30
+    chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.categoryAxis.labels.fontName = "Helvetica"
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontName = "Helvetica"
+    chart.valueAxis.labels.fontSize = 7
+    chart.bars.strokeColor = None
+    vmin, vmax = min(spec.values, default=0), max(spec.values, default=0)
+    for i, value in enumerate(spec.values):
+        chart.bars[(0, i)].fillColor = _scale_color(value, vmin, vmax)
+    drawing.add(chart)
+    return drawing
+
+
+def _line(spec, width, height):
+    drawing = _drawing(spec, width, height)
+    x, y, w, h = _plot_area(width, height)
+    chart = HorizontalLineChart()
+    chart.x, chart.y, chart.width, chart.height = x, y, w, h
+    chart.data = [list(spec.values)]
+    step = max(1, len(spec.labels) // 12)
+    chart.categoryAxis.categoryNames = [str(label) if i % step == 0 else "" for i, label in enumerate(spec.labels)]
+    chart.categoryAxis.labels.angle = 30
+    chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.categoryAxis.labels.fontName = "Helvetica"
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontName = "Helvetica"
+    chart.valueAxis.labels.fontSize = 7
+    chart.lines[0].strokeColor = PRIMARY
+    chart.lines[0].strokeWidth = 1.5
+    chart.lines[0].symbol = makeMarker('FilledCircle', size=3, fillColor=PRIMARY)
+    drawing.add(chart)
+    return drawing
+
+
+def _histogram(spec, width, height):
+    drawing = _drawing(spec, width, height)
+    x, y, w, h = _plot_area(width, height)
+    edges, counts = spec.edges, spec.counts
+    y_axis = _value_axis(x, y, h, 0, max(int(counts.max()), 1))
+    x_axis = XValueAxis()
+    x_axis.setPosition(x, y, w)
+    x_axis.labels.fontName = "Helvetica"
+    x_axis.labels.fontSize = 7
+    x_axis.configure([(float(edges[0]), float(edges[-1]))])
+    for left, right, count in zip(edges[:-1], edges[1:], counts):
+        if count:
+            x0, x1 = x_axis.scale(float(left)), x_axis.scale(float(right))
+            drawing.add(Rect(x0, y, max(x1 - x0 - 0.5, 0.5), y_axis.scale(float(count)) - y,
+                             fillColor=PRIMARY, strokeColor=None))
+    drawing.add(x_axis)
+    drawing.add(y_axis)
+    return drawing
+
+
+def _box(spec, width, height):
+    drawing = _drawing(spec, width, height)
+    x, y, w, h = _plot_area(width, height)
+    stats = spec.stats
+    points = [np.concatenate([[row.lowerfence, row.upperfence], row.outliers]) for row in stats.itertuples()]
+    values = np.concatenate(points) if points else np.array([0.0, 1.0])
+    vmin, vmax = float(np.nanmin(values)), float(np.nanmax(values))
+    if vmax <= vmin:
+        vmax = vmin + 1
+    y_axis = _value_axis(x, y, h, vmin, vmax)
+    drawing.add(Line(x, y, x + w, y, strokeColor=colors.black, strokeWidth=0.5))
+
+    slot = w / max(len(stats), 1)
+    box_width = min(slot * 0.5, 60)
+    for i, (label, row) in enumerate(stats.iterrows()):
+        cx = x + slot * (i + 0.5)
+        left = cx - box_width / 2
+        q1, median, q3 = (y_axis.scale(row[name]) for name in ('q1', 'median', 'q3'))
+        low, high = y_axis.scale(row['lowerfence']), y_axis.scale(row['upperfence'])
+        drawing.add(Line(cx, low, cx, q1, strokeColor=OUTLIER))
+        drawing.add(Line(cx, q3, cx, high, strokeColor=OUTLIER))
+        drawing.add(Line(cx - box_width / 4, low, cx + box_width / 4, low, strokeColor=OUTLIER))
+        drawing.add(Line(cx - box_width / 4, high, cx + box_width / 4, high, strokeColor=OUTLIER))
+        drawing.add(Rect(left, q1, box_width, max(q3 - q1, 0.5), fillColor=colors.HexColor(TEAL[1]),
+                         strokeColor=OUTLIER))
+        drawing.add(Line(left, median, left + box_width, median, strokeColor=OUTLIER, strokeWidth=1.5))
+        for value in row['outliers']:
+            drawing.add(Circle(cx, y_axis.scale(float(value)), 1.5, fillColor=OUTLIER, strokeColor=None))
+        drawing.add(String(cx, y - 12, _short(label), fontName="Helvetica", fontSize=7, textAnchor='middle'))
+    drawing.add(y_axis)
+    return drawing
+
+
+_BUILDERS = {'bar': _bar, 'line': _line, 'histogram': _histogram, 'box': _box}
+
+
+def build_drawing(spec, width, height):
+    return _BUILDERS[spec.kind](spec, width, height)
+
+
+def draw_chart(canvas, spec, x, y, width, height):
+    renderPDF.draw(build_drawing(spec, width, height), canvas, x, y)
@@ -0,0 +1,66 @@
+import threading
+from io import BytesIO
+
+from utils1 import cache
+from utils1.profiling import profiled
+from utils1.report import REPORT_VERSION, report
+
+# Generated reports are kept on disk per dataset, date filter and chart
+# backend; the page shows small PNG thumbnails of the first pages and the full
+# PDF is only read when someone downloads it.
+PREVIEW_PAGES = 3
+THUMBNAIL_WIDTH = 320
+
+# PDFium is not thread-safe, and Streamlit sessions run on separate threads.
+_pdfium_lock = threading.Lock()
+
+
+def report_key(dataset_key, start=None, end=None):
+    return f"{dataset_key}-{start or ''}-{end or ''}"
+
+
+def _report_kind(backend):
+    return f"report-v{REPORT_VERSION}-{backend}"
+
+
+def cached_report_path(dataset_key, backend, start=None, end=None):
+    return cache.get_file(report_key(dataset_key, start, end), _report_kind(backend), "pdf")
+
+
+def build_report(df, summaries, dataset_key, backend, start=None, end=None, progress=None):
+    # df and summaries must be what dataset_key and the range describe.
+    def write(tmp):
+        with open(tmp, "wb") as fh:
+            fh.write(report(df, summaries, backend=backend, progress=progress).getbuffer())
+
+    return cache.cached_file(report_key(dataset_key, start, end), _report_kind(backend), "pdf", write)
+
+
+@profiled("pdf thumbnails")
+def render_thumbnails(path, pages=PREVIEW_PAGES, width=THUMBNAIL_WIDTH):
+    # Returns (PNG bytes of the first pages, total page count).
+    import pypdfium2 as pdfium
+
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(path)
+        try:
+            thumbnails = []
+            for index in range(min(pages, len(pdf))):
+                page = pdf[index]
+                image = page.render(scale=width / page.get_width()).to_pil()
+                buffer = BytesIO()
+                image.save(buffer, format="PNG", optimize=True)
+                thumbnails.append(buffer.getvalue())
+                page.close()
+            return thumbnails, len(pdf)
+        finally:
+            pdf.close()
+
+
+def cached_thumbnails(path, pages=PREVIEW_PAGES, width=THUMBNAIL_WIDTH):
+    # The report path already identifies the dataset, filter and backend.
+    key = cache.dataset_key(f"{path}:{pages}:{width}".encode())
+    value = cache.get_object(key, "pdf-thumbnails")
+    if value is None:
+        value = cache.put_object(key, "pdf-thumbnails", render_thumbnails(path, pages, width))
+    return value
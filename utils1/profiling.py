@@ -0,0 +1,157 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+import pandas as pd
+
+# Per-stage wall time, peak traced memory and row counts for one script run.
+# Nothing is recorded unless a run has been started on the current thread, so
+# the instrumented functions only pay for a thread-local lookup when it is off.
+# Memory tracing is separate because tracemalloc slows allocation-heavy parsing
+# several times over.
+ENABLED_BY_DEFAULT = os.environ.get("TICKET_PROFILING", "").lower() in ("1", "true", "yes")
+TRACE_MEMORY = os.environ.get("TICKET_PROFILING_MEMORY", "").lower() in ("1", "true", "yes")
+
+_state = threading.local()
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+
+
+@dataclass
+class StageRecord:
+    name: str
+    depth: int
+    seconds: float = 0.0
+    peak_mb: float = None
+    rows_in: int = None
+    rows_out: int = None
+    error: str = None
+
+
+@dataclass
+class Run:
+    label: str
+    memory: bool
+    started: float = field(default_factory=time.time)
+    seconds: float = None
+    stages: list = field(default_factory=list)
+    _stack: list = field(default_factory=list, repr=False)
+
+    def to_frame(self):
+        if not self.stages:
+            return pd.DataFrame(columns=['stage', 'seconds', 'peak_mb', 'rows_in', 'rows_out'])
+        frame = pd.DataFrame([asdict(record) for record in self.stages])
+        # Indent nested stages so the table reads as a call tree.
+        frame.insert(0, 'stage', ['  ' * depth + name for depth, name in zip(frame['depth'], frame['name'])])
+        frame[['rows_in', 'rows_out']] = frame[['rows_in', 'rows_out']].astype('Int64')
+        return frame.drop(columns=['name', 'depth'])
+
+    def to_json(self):
+        return json.dumps({
+            'label': self.label,
+            'started': self.started,
+            'seconds': self.seconds,
+            'memory_traced': self.memory,
+            'stages': [asdict(record) for record in self.stages],
+        }, indent=2, default=str)
+
+
+def current_run():
+    return getattr(_state, 'run', None)
+
+
+def start_run(label="run", memory=TRACE_MEMORY):
+    # tracemalloc is process-wide: it stays on while any thread has a run open,
+    # and concurrent runs see each other's allocations in their peaks.
+    global _tracing_runs
+    if current_run() is not None:
+        end_run()  # the previous run on this thread stopped before ending its own
+    run = Run(label=label, memory=memory)
+    if memory:
+        with _tracing_lock:
+            if _tracing_runs == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            _tracing_runs += 1
+    _state.run = run
+    return run
+
+
+def end_run():
+    global _tracing_runs
+    run = current_run()
+    if run is None:
+        return None
+    _state.run = None
+    run.seconds = time.time() - run.started
+    if run.memory:
+        with _tracing_lock:
+            _tracing_runs -= 1
+            if _tracing_runs == 0 and tracemalloc.is_tracing():
+                tracemalloc.stop()
+    return run
+
+
+def _rows(value):
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    return len(value) if isinstance(value, pd.DataFrame) else None
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    # Yields the StageRecord (or None when off) so callers can set rows_out.
+    run = current_run()
+    if run is None:
+        yield None
+        return
+    record = StageRecord(name=name, depth=len(run._stack), rows_in=rows_in)
+    run.stages.append(record)
+    # Each open stage tracks the highest peak seen by itself and its children;
+    # tracemalloc's peak is reset around children so it can be split per stage.
+    frame = {'record': record, 'start_mb': 0.0, 'peak_mb': 0.0}
+    if run.memory:
+        current, peak = tracemalloc.get_traced_memory()
+        if run._stack:
+            run._stack[-1]['peak_mb'] = max(run._stack[-1]['peak_mb'], peak / 1024 ** 2)
+        frame['start_mb'] = frame['peak_mb'] = current / 1024 ** 2
+        tracemalloc.reset_peak()
+    run._stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as exc:
+        record.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        record.seconds = time.perf_counter() - start
+        run._stack.pop()
+        if run.memory:
+            peak_mb = max(frame['peak_mb'], tracemalloc.get_traced_memory()[1] / 1024 ** 2)
+            record.peak_mb = peak_mb - frame['start_mb']
+            if run._stack:
+                run._stack[-1]['peak_mb'] = max(run._stack[-1]['peak_mb'], peak_mb)
+            tracemalloc.reset_peak()
+
+
+def profiled(name=None):
+    # Decorator form of stage(); rows come from the first DataFrame argument and
+    # from the result (or the first item of a tuple result).
+    def decorate(fn):
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current_run() is None:
+                return fn(*args, **kwargs)
+            rows_in = next((len(arg) for arg in args if isinstance(arg, pd.DataFrame)), None)
+            with stage(stage_name, rows_in) as record:
+                result = fn(*args, **kwargs)
+                record.rows_out = _rows(result)
+            return result
+        return wrapper
+    return decorate
@@ -1,15 +1,22 @@
 import plotly.express as px
 import streamlit as st
 import pandas as pd
-
-def recommendation(df):
+from utils1.aggregations import get_summaries, count_frame, monthly_frame, hourly_frame
+from utils1.time_index import date_bounds, slice_date_range
+from utils1.charts import histogram_figure
+from utils1.profiling import profiled
+from utils1.sla import get_sla_summary
+
+@st.fragment
+@profiled("recommendation tab")
+def recommendation(df, dataset_key):
+    # A fragment: the date pickers and reset button rerun only this section.
     st.markdown("## 📊 Data Analysis Recommendation")
     st.subheader("🗕️ Select Date Range")
 
-    if 'created_time' in df.columns and not df['created_time'].isna().all():
-        df['created_date'] = df['created_time'].dt.date
-        min_date = df['created_date'].min()
-        max_date = df['created_date'].max()
+    bounds = date_bounds(df)
+    if bounds is not None:
+        min_date, max_date = bounds
 
         col1, col2 = st.columns(2)
         with col1:
@@ -22,28 +29,32 @@ def recommendation(df):
         reset_filter = st.button("🔁 Reset to Default", key="reset_button_2")
 
         if reset_filter:
-            df_filtered = df.copy()
+            df_filtered = df
+            date_range = (None, None)
             st.info("Showing all available data (no date filter applied).")
         elif start_date > end_date:
             st.warning("⚠️ Start date is after end date. Please select a valid range.")
             return
         else:
-            df_filtered = df[(df['created_date'] >= start_date) & (df['created_date'] <= end_date)]
+            df_filtered = slice_date_range(df, start_date, end_date)
+            date_range = (start_date, end_date)
     else:
-        df_filtered = df.copy()
+        df_filtered = df
+        date_range = (None, None)
+
+    summaries = get_summaries(df_filtered, dataset_key, *date_range)
 
     st.subheader("📌 Overview Metrics")
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total Tickets", len(df_filtered))
-    col2.metric("Avg Resolution Time (hrs)", f"{df_filtered['resolution_time'].mean():.2f}")
-    col3.metric("Departments Involved", df_filtered['department'].nunique())
+    col1.metric("Total Tickets", summaries.rows)
+    col2.metric("Avg Resolution Time (hrs)", f"{summaries.resolution_mean:.2f}")
+    col3.metric("Departments Involved", summaries.department_count)
 
     st.subheader("📊 Visual Insights")
 
     # Technician Insight
-    if 'technician' in df_filtered.columns:
-        tech_counts = df_filtered['technician'].value_counts().head(10).reset_index()
-        tech_counts.columns = ['Technician', 'count']
+    if 'technician' in summaries.counts:
+        tech_counts = count_frame(summaries, 'technician', 'Technician', top=10)
         fig = px.bar(tech_counts, x='Technician', y='count', title="Top 10 Technicians")
         st.plotly_chart(fig, use_container_width=True)
         top_tech = tech_counts.iloc[0]
@@ -55,39 +66,53 @@ def recommendation(df):
             st.markdown(f"**Recommendation**: Encourage knowledge-sharing from {top_tech['Technician']}.")
 
     # Department Insight
-    if 'department' in df_filtered.columns:
-        dept_counts = df_filtered['department'].value_counts().head(10).reset_index()
-        dept_counts.columns = ['Department', 'count']
+    if 'department' in summaries.counts:
+        dept_counts = count_frame(summaries, 'department', 'Department', top=10)
         fig = px.bar(dept_counts, x='Department', y='count', title="Top 10 Departments")
         st.plotly_chart(fig, use_container_width=True)
-        slow_dept = df_filtered.groupby('department')['resolution_time'].mean().reset_index().sort_values('resolution_time', ascending=False).iloc[0]
-        st.markdown(f"**Slowest Resolution Dept**: {slow_dept['department']} ({slow_dept['resolution_time']:.2f} hrs avg)")
-        st.markdown("**Recommendation**: Review processes and resource allocation.")
-
-    # SLA (Optional)
-    if 'sla_hours' in df_filtered.columns:
-        df_filtered['sla_met'] = df_filtered['resolution_time'] <= df_filtered['sla_hours']
-        sla_rate = df_filtered['sla_met'].mean() * 100
-        st.markdown(f"**SLA Compliance**: {sla_rate:.2f}%")
-        if sla_rate < 80:
+        slow_dept = summaries.department_resolution.dropna()
+        if len(slow_dept):
+            st.markdown(f"**Slowest Resolution Dept**: {slow_dept.index[0]} ({slow_dept.iloc[0]:.2f} hrs avg)")
+            st.markdown("**Recommendation**: Review processes and resource allocation.")
+
+    # SLA Compliance, in business hours net of on-hold time (see utils1.sla)
+    sla = get_sla_summary(df_filtered, dataset_key, *date_range)
+    if sla is not None and sla.measured:
+        calendar = sla.calendar
+        st.subheader("⏱️ SLA Compliance")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Resolution SLA Met", f"{sla.compliance:.2f}%", help=f"{sla.met:,} of {sla.measured:,} resolved tickets")
+        col2.metric("Response SLA Met", "n/a" if pd.isna(sla.response_compliance) else f"{sla.response_compliance:.2f}%")
+        col3.metric("Median Business Hours", f"{sla.median_business_hours:.2f}")
+        st.caption(f"Business hours {calendar.start}-{calendar.end}, {calendar.weekmask}, "
+                   f"{len(calendar.holidays)} holiday(s). On-hold time is deducted only where it "
+                   "cannot have fallen outside working hours.")
+        if sla.by_department is not None and len(sla.by_department):
+            dept = sla.by_department.reset_index()
+            fig = px.bar(dept, x='department', y='compliance', hover_data=['tickets', 'breached'],
+                         title="Resolution SLA Compliance by Department (%)")
+            st.plotly_chart(fig, use_container_width=True)
+        if sla.by_technician is not None and len(sla.by_technician):
+            st.markdown("**Lowest SLA compliance by technician**")
+            st.dataframe(sla.by_technician.head(10).round({'compliance': 2}), use_container_width=True)
+        if sla.compliance < 80:
             st.markdown("**Recommendation**: Improve SLA adherence with alerts and better triaging.")
         else:
             st.markdown("**Recommendation**: Keep consistent or optimize further with auto-routing.")
 
     # Resolution Time Distribution
     if 'resolution_time' in df_filtered.columns:
-        fig = px.histogram(df_filtered, x='resolution_time', nbins=30, marginal="box", title="Distribution of Resolution Time")
+        fig = histogram_figure(df_filtered, 'resolution_time', nbins=30, title="Distribution of Resolution Time")
         st.plotly_chart(fig, use_container_width=True)
-        avg_res = df_filtered['resolution_time'].mean()
+        avg_res = summaries.resolution_mean
         st.markdown(f"**Average**: {avg_res:.2f} hrs")
         if avg_res > 48:
-            loss = (avg_res - 48) * len(df_filtered) * 50
+            loss = (avg_res - 48) * summaries.rows * 50
             st.markdown(f"**Recommendation**: Optimize resolution time. Potential cost savings: ~RM {loss:,.0f}")
 
     # Monthly Volume
-    if 'created_time' in df_filtered.columns:
-        df_filtered['created_month'] = df_filtered['created_time'].dt.to_period("M").astype(str)
-        monthly = df_filtered.groupby('created_month').size().reset_index(name='count')
+    if summaries.monthly is not None:
+        monthly = monthly_frame(summaries)
         fig = px.line(monthly, x='created_month', y='count', title="Monthly Ticket Volume")
         st.plotly_chart(fig, use_container_width=True)
         if len(monthly) >= 6:
@@ -99,19 +124,16 @@ def recommendation(df):
                 st.markdown("**Recommendation**: Increase staffing or preventive support in these months.")
 
     # Priority Distribution
-    if 'priority' in df_filtered.columns:
-        pri_counts = df_filtered['priority'].value_counts().reset_index()
-        pri_counts.columns = ['Priority', 'Count']
+    if 'priority' in summaries.counts:
+        pri_counts = count_frame(summaries, 'priority', 'Priority', 'Count')
         fig = px.bar(pri_counts, x='Priority', y='Count', title="Tickets by Priority")
         st.plotly_chart(fig, use_container_width=True)
         st.markdown(f"Most common: **{pri_counts.iloc[0]['Priority']}**")
         st.markdown(f"**Recommendation**: Ensure consistent priority assignment policies.")
 
     # Created Hour
-    if 'created_time' in df_filtered.columns:
-        df_filtered['created_hour'] = df_filtered['created_time'].dt.hour
-        hour_counts = df_filtered['created_hour'].value_counts().sort_index().reset_index()
-        hour_counts.columns = ['Hour', 'Count']
+    if summaries.hourly is not None:
+        hour_counts = hourly_frame(summaries)
         fig = px.bar(hour_counts, x='Hour', y='Count', title="Tickets by Hour of Day")
         st.plotly_chart(fig, use_container_width=True)
         peak = hour_counts.iloc[hour_counts['Count'].idxmax()]['Hour']
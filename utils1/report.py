@@ -1,16 +1,116 @@
+import hashlib
+import multiprocessing
 import os
-import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
-from PIL import Image
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 import plotly.express as px
 import pandas as pd
 import plotly.io as pio
+from utils1.aggregations import compute_summaries, count_frame, monthly_frame, box_stats, histogram_bins
+from utils1.cache import get_object, put_object
+from utils1.charts import box_figure, histogram_figure
+from utils1.pdf_charts import ChartSpec, draw_chart
+from utils1.profiling import profiled
 
 pio.templates.default = "plotly"  # ensure modern layout/colors
 
-def report(df, uploaded_file):
+# Charts are drawn at 500x300 pt; rendering at that size with a pixel scale
+# keeps them sharp without a second resize pass.
+CHART_WIDTH = 500
+CHART_HEIGHT = 300
+CHART_SCALE = 1.6
+REPORT_BACKENDS = ["plotly", "vector"]
+# Part of the cache key for generated reports; bump when the layout changes.
+REPORT_VERSION = 1
+# kaleido 0.2 sends every export through a single subprocess per Python
+# process, so charts are rasterized in parallel on a pool of worker processes
+# (each with its own kaleido). The pool is started on first use and kept, since
+# starting a worker and its kaleido costs seconds. With one worker, charts are
+# rendered in the calling process.
+RENDER_WORKERS = int(os.environ.get("REPORT_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def _rasterize(spec):
+    # Runs in a render worker; takes the figure as JSON so it pickles cheaply.
+    return pio.to_image(pio.from_json(spec), format="png", width=CHART_WIDTH, height=CHART_HEIGHT,
+                        scale=CHART_SCALE)
+
+
+def _png_key(spec):
+    return hashlib.blake2b(f"{CHART_WIDTH}x{CHART_HEIGHT}@{CHART_SCALE}:{spec}".encode(), digest_size=16).hexdigest()
+
+
+def _render_executor():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn, not fork: Streamlit sessions run on threads, which fork does not copy safely.
+            _render_pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS,
+                                               mp_context=multiprocessing.get_context("spawn"))
+        return _render_pool
+
+
+def _reset_executor():
+    global _render_pool
+    with _render_pool_lock:
+        _render_pool = None
+
+
+@profiled("render charts")
+def render_charts(figs, on_rendered=None):
+    # PNG bytes per figure, cached on the figure spec. on_rendered(index) is
+    # called as each chart is ready, in completion order; if it raises, charts
+    # not yet started are abandoned.
+    specs = [fig.to_json() for fig in figs]
+    keys = [_png_key(spec) for spec in specs]
+    images = [get_object(key, "chart-png") for key in keys]
+    missing = [index for index, png in enumerate(images) if png is None]
+    for index, png in enumerate(images):
+        if png is not None and on_rendered is not None:
+            on_rendered(index)
+
+    if RENDER_WORKERS <= 1 or len(missing) <= 1:
+        for index in missing:
+            images[index] = put_object(keys[index], "chart-png", _rasterize(specs[index]))
+            if on_rendered is not None:
+                on_rendered(index)
+        return images
+
+    futures = {_render_executor().submit(_rasterize, specs[index]): index for index in missing}
+    try:
+        for future in as_completed(futures):
+            index = futures[future]
+            images[index] = put_object(keys[index], "chart-png", future.result())
+            if on_rendered is not None:
+                on_rendered(index)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); the next report starts a fresh pool.
+        _reset_executor()
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+    return images
+
+
+@profiled("report")
+def report(df, summaries=None, backend="plotly", progress=None):
+    # backend: "plotly" rasterizes the Plotly charts through kaleido, "vector"
+    # draws them natively with ReportLab (no browser, smaller and sharper PDFs).
+    # progress(done, total, title), if given, is called after each chart; an
+    # exception it raises (e.g. a cancelled job) aborts the report.
+    if backend not in REPORT_BACKENDS:
+        raise ValueError(f"Unknown report backend '{backend}'. Expected one of: {', '.join(REPORT_BACKENDS)}")
+    if summaries is None:
+        summaries = compute_summaries(df)
     buffer = BytesIO()
     c = canvas.Canvas(buffer, pagesize=letter)
     c.setFont("Helvetica", 10)
@@ -41,14 +141,14 @@ def report(df, uploaded_file):
     # Header
     c.drawString(50, y, "📄 Incident Ticket Report Summary")
     y -= 15
-    c.drawString(50, y, f"Total Rows: {df.shape[0]}")
+    c.drawString(50, y, f"Total Rows: {summaries.rows}")
     y -= 15
-    c.drawString(50, y, f"Total Columns: {df.shape[1]}")
+    c.drawString(50, y, f"Total Columns: {summaries.columns}")
     y -= 30
 
     # Missing values
     c.drawString(50, y, "Missing Values:")
-    for col, val in df.isnull().sum().items():
+    for col, val in summaries.missing.items():
         if val > 0:
             y -= 15
             c.drawString(70, y, f"{col}: {val}")
@@ -61,89 +161,121 @@ def report(df, uploaded_file):
     c.drawString(50, y, "Visual Insights:")
     y -= 20
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        chart_configs = []
-
-        if 'technician' in df.columns:
-            tech_counts = df['technician'].value_counts().head(10).reset_index()
-            tech_counts.columns = ['Technician', 'count']
-            fig = px.bar(tech_counts, x='Technician', y='count', color='count',
-                         color_continuous_scale=color_palette,
-                         title="Top 10 Technicians")
-            insight = f"Top Technician: {tech_counts.iloc[0]['Technician']} handled the most tickets.\nRecommendation: Recognize {tech_counts.iloc[0]['Technician']} and consider mentoring roles."
-            chart_configs.append((fig, "Top Technicians", insight))
-
-        if 'department' in df.columns:
-            dept_counts = df['department'].value_counts().head(10).reset_index()
-            dept_counts.columns = ['Department', 'count']
-            fig = px.bar(dept_counts, x='Department', y='count', color='count',
-                         color_continuous_scale=color_palette,
-                         title="Top 10 Departments")
-            insight = f"Top Department: {dept_counts.iloc[0]['Department']} has the highest number of tickets.\nRecommendation: Investigate workload distribution or underlying issues."
-            chart_configs.append((fig, "Top Departments", insight))
-
-        if 'priority' in df.columns and 'resolution_time' in df.columns:
-            fig = px.box(df, x='priority', y='resolution_time',
-                         title="Resolution Time by Priority")
-            insight = "Ensure high-priority tickets are resolved quicker than low-priority ones.\nRecommendation: Reassess escalation and SLA strategies."
-            chart_configs.append((fig, "Resolution Time by Priority", insight))
-
-        if 'site' in df.columns:
-            site_counts = df['site'].value_counts().head(10).reset_index()
-            site_counts.columns = ['Site', 'count']
-            fig = px.bar(site_counts, x='Site', y='count', color='count',
-                         color_continuous_scale=color_palette,
-                         title="Top Sites by Ticket Volume")
-            insight = f"Top Site: {site_counts.iloc[0]['Site']}.\nRecommendation: Assign focused support team or preventive strategy."
-            chart_configs.append((fig, "Top Sites", insight))
-
-        if 'category' in df.columns:
-            cat_counts = df['category'].value_counts().reset_index()
-            cat_counts.columns = ['Category', 'count']
-            fig = px.bar(cat_counts, x='Category', y='count', color='count',
-                         color_continuous_scale=color_palette,
-                         title="Tickets by Category")
-            insight = f"Top Category: {cat_counts.iloc[0]['Category']}.\nRecommendation: Investigate root causes and reduce reoccurrence via training or upgrades."
-            chart_configs.append((fig, "Tickets by Category", insight))
-
-        if 'resolution_time' in df.columns:
-            fig = px.histogram(df, x='resolution_time', nbins=30, marginal="box",
-                               color_discrete_sequence=color_palette,
-                               title="Distribution of Resolution Time (hours)")
-            avg_res = df['resolution_time'].mean()
-            if avg_res > 48:
-                insight = f"Avg Resolution Time: {avg_res:.2f} hrs exceeds 48-hour benchmark.\nRecommendation: Streamline process. Potential savings RM {(avg_res - 48)*len(df)*50:,.0f}"
-            else:
-                insight = f"Avg Resolution Time: {avg_res:.2f} hrs.\nRecommendation: Maintain or improve current workflow."
-            chart_configs.append((fig, "Resolution Time Distribution", insight))
-
-        if 'created_time' in df.columns:
-            df['created_month'] = df['created_time'].dt.to_period("M").astype(str)
-            monthly = df.groupby('created_month').size().reset_index(name='count')
-            fig = px.line(monthly, x='created_month', y='count', markers=True,
-                          title="Monthly Ticket Volume")
-            top_month = monthly.iloc[monthly['count'].idxmax()]['created_month']
-            insight = f"Busiest month: {top_month}.\nRecommendation: Prepare early with staffing and preventive actions."
-            chart_configs.append((fig, "Monthly Volume", insight))
-
-        # Loop through charts
-        for fig_obj, title, note in chart_configs:
-            img_path = os.path.join(tmpdir, f"{title}.png")
-            fig_obj.write_image(img_path, width=800, height=500)
-            image = Image.open(img_path).resize((500, 300))
-
-            # Ensure space, else new page
-            if y < 400:
-                c.showPage()
-                c.setFont("Helvetica", 10)
-                y = 750
+    # Each chart carries a lazy Plotly figure for the raster backend and a
+    # ChartSpec of pre-aggregated data for the vector one.
+    chart_configs = []
 
-            c.drawInlineImage(image, 50, y - 300)
-            y -= 320
-            c.drawString(50, y, title)
-            y -= 15
-            add_text_block(note, x=60, line_spacing=14)
-            y -= 20
+    if 'technician' in summaries.counts:
+        tech_counts = count_frame(summaries, 'technician', 'Technician', top=10)
+        figure = lambda data=tech_counts: px.bar(data, x='Technician', y='count', color='count',
+                                                 color_continuous_scale=color_palette,
+                                                 title="Top 10 Technicians")
+        spec = ChartSpec('bar', "Top 10 Technicians", labels=tech_counts['Technician'].tolist(),
+                         values=tech_counts['count'].tolist())
+        insight = f"Top Technician: {tech_counts.iloc[0]['Technician']} handled the most tickets.\nRecommendation: Recognize {tech_counts.iloc[0]['Technician']} and consider mentoring roles."
+        chart_configs.append((figure, spec, "Top Technicians", insight))
+
+    if 'department' in summaries.counts:
+        dept_counts = count_frame(summaries, 'department', 'Department', top=10)
+        figure = lambda data=dept_counts: px.bar(data, x='Department', y='count', color='count',
+                                                 color_continuous_scale=color_palette,
+                                                 title="Top 10 Departments")
+        spec = ChartSpec('bar', "Top 10 Departments", labels=dept_counts['Department'].tolist(),
+                         values=dept_counts['count'].tolist())
+        insight = f"Top Department: {dept_counts.iloc[0]['Department']} has the highest number of tickets.\nRecommendation: Investigate workload distribution or underlying issues."
+        chart_configs.append((figure, spec, "Top Departments", insight))
+
+    # Open-tickets-only exports have no resolution times to plot.
+    resolved = 'resolution_time' in df.columns and df['resolution_time'].notna().any()
+
+    if 'priority' in df.columns and resolved:
+        figure = lambda: box_figure(df, 'priority', 'resolution_time',
+                                    title="Resolution Time by Priority")
+        spec = None
+        if backend == "vector":
+            spec = ChartSpec('box', "Resolution Time by Priority",
+                             stats=box_stats(df, 'priority', 'resolution_time'))
+        insight = "Ensure high-priority tickets are resolved quicker than low-priority ones.\nRecommendation: Reassess escalation and SLA strategies."
+        chart_configs.append((figure, spec, "Resolution Time by Priority", insight))
+
+    if 'site' in summaries.counts:
+        site_counts = count_frame(summaries, 'site', 'Site', top=10)
+        figure = lambda data=site_counts: px.bar(data, x='Site', y='count', color='count',
+                                                 color_continuous_scale=color_palette,
+                                                 title="Top Sites by Ticket Volume")
+        spec = ChartSpec('bar', "Top Sites by Ticket Volume", labels=site_counts['Site'].tolist(),
+                         values=site_counts['count'].tolist())
+        insight = f"Top Site: {site_counts.iloc[0]['Site']}.\nRecommendation: Assign focused support team or preventive strategy."
+        chart_configs.append((figure, spec, "Top Sites", insight))
+
+    if 'category' in summaries.counts:
+        cat_counts = count_frame(summaries, 'category', 'Category')
+        figure = lambda data=cat_counts: px.bar(data, x='Category', y='count', color='count',
+                                                color_continuous_scale=color_palette,
+                                                title="Tickets by Category")
+        spec = ChartSpec('bar', "Tickets by Category", labels=cat_counts['Category'].tolist(),
+                         values=cat_counts['count'].tolist())
+        insight = f"Top Category: {cat_counts.iloc[0]['Category']}.\nRecommendation: Investigate root causes and reduce reoccurrence via training or upgrades."
+        chart_configs.append((figure, spec, "Tickets by Category", insight))
+
+    if resolved:
+        figure = lambda: histogram_figure(df, 'resolution_time', nbins=30, color=color_palette[0],
+                                          title="Distribution of Resolution Time (hours)")
+        spec = None
+        if backend == "vector":
+            edges, counts = histogram_bins(df['resolution_time'], nbins=30)
+            spec = ChartSpec('histogram', "Distribution of Resolution Time (hours)", edges=edges, counts=counts)
+        avg_res = summaries.resolution_mean
+        if avg_res > 48:
+            insight = f"Avg Resolution Time: {avg_res:.2f} hrs exceeds 48-hour benchmark.\nRecommendation: Streamline process. Potential savings RM {(avg_res - 48)*summaries.rows*50:,.0f}"
+        else:
+            insight = f"Avg Resolution Time: {avg_res:.2f} hrs.\nRecommendation: Maintain or improve current workflow."
+        chart_configs.append((figure, spec, "Resolution Time Distribution", insight))
+
+    if summaries.monthly is not None:
+        monthly = monthly_frame(summaries)
+        figure = lambda data=monthly: px.line(data, x='created_month', y='count', markers=True,
+                                              title="Monthly Ticket Volume")
+        spec = ChartSpec('line', "Monthly Ticket Volume", labels=monthly['created_month'].tolist(),
+                         values=monthly['count'].tolist())
+        top_month = monthly.iloc[monthly['count'].idxmax()]['created_month']
+        insight = f"Busiest month: {top_month}.\nRecommendation: Prepare early with staffing and preventive actions."
+        chart_configs.append((figure, spec, "Monthly Volume", insight))
+
+    total = len(chart_configs)
+    done = 0
+
+    def step(index):
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, total, chart_configs[index][2])
+
+    if backend == "vector":
+        images = [None] * len(chart_configs)
+    else:
+        # Rasterize every chart up front (in parallel, cached by figure content),
+        # then lay them out in order.
+        images = render_charts([figure() for figure, _, _, _ in chart_configs], step)
+
+    for index, ((_, spec, title, note), png) in enumerate(zip(chart_configs, images)):
+        # Ensure space, else new page
+        if y < 400:
+            c.showPage()
+            c.setFont("Helvetica", 10)
+            y = 750
+
+        if png is None:
+            draw_chart(c, spec, 50, y - CHART_HEIGHT, CHART_WIDTH, CHART_HEIGHT)
+            c.setFont("Helvetica", 10)
+            step(index)
+        else:
+            c.drawImage(ImageReader(BytesIO(png)), 50, y - CHART_HEIGHT, width=CHART_WIDTH, height=CHART_HEIGHT)
+        y -= 320
+        c.drawString(50, y, title)
+        y -= 15
+        add_text_block(note, x=60, line_spacing=14)
+        y -= 20
 
     c.save()
     buffer.seek(0)
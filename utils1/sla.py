@@ -0,0 +1,176 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from utils1.profiling import profiled
+
+# Resolution SLAs measured in business hours. Each timestamp is mapped to the
+# working seconds elapsed since a fixed epoch (whole business days via
+# np.busday_count plus the clipped part of its own day), so the working time
+# between two timestamps is one subtraction over the whole column.
+WORK_HOURS = os.environ.get("TICKET_SLA_WORK_HOURS", "09:00-18:00")
+WEEKMASK = os.environ.get("TICKET_SLA_WEEKMASK", "Mon Tue Wed Thu Fri")
+HOLIDAYS = os.environ.get("TICKET_SLA_HOLIDAYS", "")  # comma-separated YYYY-MM-DD
+MIN_GROUP_TICKETS = 5
+MAX_MEMO_ENTRIES = 32
+
+_EPOCH = np.datetime64('2000-01-01', 'D')
+_memo = OrderedDict()
+_lock = threading.Lock()
+
+
+def _clock_seconds(text):
+    hours, minutes = text.strip().split(":")
+    return int(hours) * 3600 + int(minutes) * 60
+
+
+@dataclass(frozen=True)
+class BusinessCalendar:
+    start: str = "09:00"
+    end: str = "18:00"
+    weekmask: str = "Mon Tue Wed Thu Fri"
+    holidays: tuple = ()
+
+    def __post_init__(self):
+        if not 0 <= _clock_seconds(self.start) < _clock_seconds(self.end) <= 86400:
+            raise ValueError(f"Working hours must be HH:MM-HH:MM within one day, got {self.start}-{self.end}")
+
+    @property
+    def day_seconds(self):
+        return _clock_seconds(self.end) - _clock_seconds(self.start)
+
+    def busdaycalendar(self):
+        return np.busdaycalendar(weekmask=self.weekmask,
+                                 holidays=np.array(self.holidays, dtype='datetime64[D]'))
+
+
+def calendar_from_env():
+    start, end = WORK_HOURS.split("-")
+    holidays = tuple(day.strip() for day in HOLIDAYS.split(",") if day.strip())
+    return BusinessCalendar(start.strip(), end.strip(), WEEKMASK, holidays)
+
+
+DEFAULT_CALENDAR = calendar_from_env()
+
+
+def _business_seconds(stamps, calendar, busdaycal):
+    # stamps: datetime64 array without NaT.
+    days = stamps.astype('datetime64[D]')
+    into_day = (stamps - days).astype('timedelta64[s]').astype('int64')
+    today = np.clip(into_day - _clock_seconds(calendar.start), 0, calendar.day_seconds)
+    today = np.where(np.is_busday(days, busdaycal=busdaycal), today, 0)
+    return np.busday_count(_EPOCH, days, busdaycal=busdaycal) * calendar.day_seconds + today
+
+
+def business_hours_between(start, end, calendar=DEFAULT_CALENDAR):
+    # Working hours from start to end, NaN where either is missing or end < start.
+    start = pd.to_datetime(pd.Series(start)).to_numpy()
+    end = pd.to_datetime(pd.Series(end)).to_numpy()
+    valid = ~np.isnat(start) & ~np.isnat(end) & (end >= start)
+    hours = np.full(len(start), np.nan)
+    if valid.any():
+        busdaycal = calendar.busdaycalendar()
+        elapsed = (_business_seconds(end[valid], calendar, busdaycal)
+                   - _business_seconds(start[valid], calendar, busdaycal))
+        hours[valid] = elapsed / 3600
+    return hours
+
+
+def _hours(series):
+    return series.dt.total_seconds().to_numpy(dtype=float) / 3600
+
+
+def _met(elapsed, target):
+    # Nullable: unknown where either side is missing.
+    met = pd.array(elapsed <= target, dtype='boolean')
+    met[np.isnan(elapsed) | np.isnan(target)] = pd.NA
+    return met
+
+
+@profiled("sla")
+def ticket_sla(df, calendar=DEFAULT_CALENDAR):
+    # Per-ticket business-hours resolution time net of on-hold time, and
+    # whether the resolution and first-response targets were met.
+    if 'created_time' not in df.columns or 'resolved_time' not in df.columns:
+        return None
+    hours = business_hours_between(df['created_time'], df['resolved_time'], calendar)
+    if 'on_hold_duration' in df.columns:
+        # Hold time is a wall-clock duration with no timestamps (a blank cell
+        # means none). Only the part that cannot have fallen outside working
+        # hours is deducted, so a weekend on hold never eats into the week.
+        hold = np.nan_to_num(_hours(df['on_hold_duration']))
+        off_hours = _hours(df['resolved_time'] - df['created_time']) - hours
+        hours = np.maximum(hours - np.clip(hold - off_hours, 0, None), 0)
+    result = pd.DataFrame({'business_resolution_hours': hours}, index=df.index)
+    if 'sla_resolution_time' in df.columns:
+        result['sla_met'] = _met(hours, _hours(df['sla_resolution_time']))
+    if 'sla_response_time' in df.columns and 'response_time_elapsed' in df.columns:
+        result['response_sla_met'] = _met(_hours(df['response_time_elapsed']), _hours(df['sla_response_time']))
+    return result
+
+
+def compliance(df, sla, by, min_tickets=MIN_GROUP_TICKETS):
+    # Share of measured tickets meeting the resolution target per group, lowest
+    # first; groups with fewer than min_tickets measured tickets are left out.
+    met = sla['sla_met']
+    frame = pd.DataFrame({by: df[by], 'met': met.fillna(False).astype(bool), 'measured': met.notna()})
+    groups = frame[frame['measured']].groupby(by, observed=True)
+    table = pd.DataFrame({'tickets': groups.size(), 'met': groups['met'].sum()})
+    table['breached'] = table['tickets'] - table['met']
+    table['compliance'] = table['met'] / table['tickets'] * 100
+    table = table[table['tickets'] >= min_tickets]
+    return table.sort_values(['compliance', 'tickets'], ascending=[True, False])
+
+
+@dataclass
+class SlaSummary:
+    measured: int
+    met: int
+    compliance: float
+    median_business_hours: float
+    response_compliance: float = float('nan')
+    by_department: pd.DataFrame = None
+    by_technician: pd.DataFrame = None
+    calendar: BusinessCalendar = field(default_factory=BusinessCalendar)
+
+
+def summarize_sla(df, calendar=DEFAULT_CALENDAR):
+    sla = ticket_sla(df, calendar)
+    if sla is None or 'sla_met' not in sla.columns:
+        return None
+    met = sla['sla_met']
+    measured = int(met.notna().sum())
+    summary = SlaSummary(
+        measured=measured,
+        met=int(met.sum()),
+        compliance=float(met.mean() * 100) if measured else float('nan'),
+        median_business_hours=float(sla['business_resolution_hours'].median()),
+        calendar=calendar,
+    )
+    if 'response_sla_met' in sla.columns and sla['response_sla_met'].notna().any():
+        summary.response_compliance = float(sla['response_sla_met'].mean() * 100)
+    if 'department' in df.columns:
+        summary.by_department = compliance(df, sla, 'department')
+    if 'technician' in df.columns:
+        summary.by_technician = compliance(df, sla, 'technician')
+    return summary
+
+
+def get_sla_summary(df, dataset_key, start=None, end=None, calendar=DEFAULT_CALENDAR):
+    # Memoized like aggregations.get_summaries: df must be what the key and
+    # range describe.
+    memo_key = (dataset_key, start, end, calendar)
+    with _lock:
+        if memo_key in _memo:
+            _memo.move_to_end(memo_key)
+            return _memo[memo_key]
+    summary = summarize_sla(df, calendar)
+    with _lock:
+        _memo[memo_key] = summary
+        while len(_memo) > MAX_MEMO_ENTRIES:
+            _memo.popitem(last=False)
+    return summary
@@ -0,0 +1,260 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from utils1.aggregations import DIMENSIONS, Summaries
+from utils1.dtypes import DERIVED_COLUMNS, month_label, optimize_dtypes
+from utils1.profiling import profiled
+from utils1.time_index import sort_by_created
+
+# A local SQLite file that cleaned exports are appended to. Tickets are keyed on
+# request_id (a re-exported ticket replaces its older row), and the figures the
+# dashboard needs are kept as additive counters, so an append only touches the
+# new batch and the rows it replaces, never the whole history.
+STORE_PATH = os.environ.get("TICKET_STORE_PATH", "ticket_store.sqlite")
+ID_COLUMN = 'request_id'
+TOTAL = '*'
+# Rebuilt on load from created_time, so never stored.
+SKIPPED_COLUMNS = set(DERIVED_COLUMNS) | {'month'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (request_id TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS columns (name TEXT PRIMARY KEY, kind TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS summary (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    rows INTEGER NOT NULL DEFAULT 0,
+    resolution_sum REAL NOT NULL DEFAULT 0,
+    resolution_rows INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def _quote(name):
+    # Column names come from export headers, so embedded quotes are escaped.
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _kind(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    if pd.api.types.is_timedelta64_dtype(series):
+        return 'timedelta'
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.infer_dtype(series, skipna=True) == 'boolean':
+        return 'bool'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'number'
+    return 'text'
+
+
+def _encode(series, kind):
+    # To plain Python values SQLite can bind: times as integer microseconds.
+    if kind in ('datetime', 'timedelta'):
+        values = series.astype(f'{kind}64[us]')
+        ticks = pd.Series(values.to_numpy().view('int64'), index=series.index).astype(object)
+        return ticks.where(values.notna(), None)
+    if kind == 'bool':
+        values = series.astype('boolean').astype('Int64')
+    elif kind == 'number':
+        values = series.astype('Float64')
+    else:
+        values = series.astype('string')
+    return values.astype(object).where(values.notna(), None)
+
+
+def _decode(series, kind):
+    if kind == 'datetime':
+        return pd.to_datetime(series, unit='us')
+    if kind == 'timedelta':
+        return pd.to_timedelta(series, unit='us')
+    if kind == 'bool':
+        return series.astype('Int64').astype('boolean')
+    if kind == 'number':
+        return pd.to_numeric(series)
+    return series
+
+
+def _ids(series):
+    # 1001, 1001.0 and "1001" must all be the same ticket.
+    if pd.api.types.is_float_dtype(series) and np.all(np.mod(series.dropna(), 1) == 0):
+        series = series.astype('Int64')
+    return series.astype('string').str.strip()
+
+
+def _contributions(df):
+    # Additive summary rows for a frame: per-dimension counts, per-month/hour
+    # volume, non-null counts per column and resolution-time sums.
+    resolution = df['resolution_time'].astype('float64') if 'resolution_time' in df.columns else None
+    parts = []
+
+    def add(dimension, keys):
+        frame = pd.DataFrame({'value': keys.to_numpy(dtype=object)})
+        frame['rows'] = 1
+        if resolution is not None:
+            frame['resolution_sum'] = resolution.fillna(0).to_numpy()
+            frame['resolution_rows'] = resolution.notna().to_numpy().astype('int64')
+        else:
+            frame['resolution_sum'] = 0.0
+            frame['resolution_rows'] = 0
+        frame = frame[keys.notna().to_numpy()]
+        grouped = frame.groupby('value', sort=False).sum().reset_index()
+        grouped.insert(0, 'dimension', dimension)
+        parts.append(grouped)
+
+    add(TOTAL, pd.Series([''] * len(df), index=df.index))
+    for dim in DIMENSIONS:
+        if dim in df.columns:
+            add(dim, df[dim].astype('string'))
+    if 'created_time' in df.columns:
+        created = df['created_time']
+        month_keys = (created.dt.year * 12 + created.dt.month - 1).astype('Int64')
+        add('created_month', month_keys.map(month_label, na_action='ignore'))
+        add('created_hour', created.dt.hour.astype('Int64').astype('string'))
+
+    present = df.notna().sum()
+    parts.append(pd.DataFrame({'dimension': '_present', 'value': present.index, 'rows': present.to_numpy(),
+                               'resolution_sum': 0.0, 'resolution_rows': 0}))
+    return pd.concat(parts, ignore_index=True)
+
+
+class TicketStore:
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _kinds(self, conn):
+        return dict(conn.execute("SELECT name, kind FROM columns ORDER BY rowid").fetchall())
+
+    def version(self):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM tickets").fetchone()[0]
+
+    def _read(self, conn, kinds, where="", params=()):
+        names = [ID_COLUMN] + [name for name in kinds if name != ID_COLUMN]
+        quoted = ", ".join(_quote(name) for name in names)
+        df = pd.read_sql_query(f"SELECT {quoted} FROM tickets {where}", conn, params=params)
+        for name, kind in kinds.items():
+            if name in df.columns:
+                df[name] = _decode(df[name], kind)
+        return df
+
+    @profiled("store append")
+    def append(self, df):
+        # Returns (inserted, replaced, skipped); rows without a request_id are skipped.
+        if ID_COLUMN not in df.columns:
+            raise ValueError(f"Cannot append to the ticket store without a '{ID_COLUMN}' column.")
+        batch = df[[col for col in df.columns if col not in SKIPPED_COLUMNS]].copy()
+        batch[ID_COLUMN] = _ids(batch[ID_COLUMN])
+        skipped = int(batch[ID_COLUMN].isna().sum())
+        batch = batch[batch[ID_COLUMN].notna()].drop_duplicates(ID_COLUMN, keep='last')
+        if batch.empty:
+            return 0, 0, skipped
+
+        with self._lock, self._connect() as conn:
+            kinds = self._kinds(conn)
+            for col in batch.columns:
+                if col not in kinds:
+                    kinds[col] = 'text' if col == ID_COLUMN else _kind(batch[col])
+                    if col != ID_COLUMN:
+                        conn.execute(f"ALTER TABLE tickets ADD COLUMN {_quote(col)}")
+                    conn.execute("INSERT INTO columns (name, kind) VALUES (?, ?)", (col, kinds[col]))
+
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch_ids (request_id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM batch_ids")
+            conn.executemany("INSERT INTO batch_ids VALUES (?)", ((value,) for value in batch[ID_COLUMN]))
+            replaced = self._read(conn, kinds, "WHERE request_id IN (SELECT request_id FROM batch_ids)")
+
+            delta = _contributions(batch)
+            if not replaced.empty:
+                old = _contributions(replaced)
+                old[['rows', 'resolution_sum', 'resolution_rows']] *= -1
+                delta = pd.concat([delta, old], ignore_index=True)
+            delta = delta.groupby(['dimension', 'value'], as_index=False).sum()
+            conn.executemany(
+                """INSERT INTO summary (dimension, value, rows, resolution_sum, resolution_rows)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (dimension, value) DO UPDATE SET
+                       rows = rows + excluded.rows,
+                       resolution_sum = resolution_sum + excluded.resolution_sum,
+                       resolution_rows = resolution_rows + excluded.resolution_rows""",
+                delta.astype(object).itertuples(index=False, name=None),
+            )
+            conn.execute("DELETE FROM summary WHERE rows = 0 AND dimension != '_present'")
+
+            names = list(batch.columns)
+            quoted = ", ".join(_quote(name) for name in names)
+            encoded = pd.DataFrame({col: _encode(batch[col], kinds[col]) for col in names})
+            conn.executemany(
+                f"INSERT OR REPLACE INTO tickets ({quoted}) VALUES ({', '.join('?' * len(names))})",
+                encoded.itertuples(index=False, name=None),
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('version', 1) "
+                         "ON CONFLICT (key) DO UPDATE SET value = value + 1")
+        return len(batch) - len(replaced), len(replaced), skipped
+
+    @profiled("store load")
+    def load(self):
+        with self._connect() as conn:
+            df = self._read(conn, self._kinds(conn))
+        if 'created_time' in df.columns:
+            df['month'] = df['created_time'].dt.to_period('M')
+        return optimize_dtypes(sort_by_created(df))
+
+    @profiled("store summaries")
+    def summaries(self):
+        with self._connect() as conn:
+            summary = pd.read_sql_query("SELECT * FROM summary", conn)
+            kinds = self._kinds(conn)
+        by_dim = {dim: frame.set_index('value') for dim, frame in summary.groupby('dimension')}
+
+        total = by_dim.get(TOTAL)
+        rows = int(total['rows'].sum()) if total is not None else 0
+        present = by_dim['_present']['rows'] if '_present' in by_dim else pd.Series(dtype='int64')
+        missing = (rows - present.reindex(list(kinds), fill_value=0)).astype('int64')
+        summaries = Summaries(rows=rows, columns=len(kinds), missing=missing)
+
+        for dim in DIMENSIONS:
+            if dim in by_dim:
+                frame = by_dim[dim].reset_index().sort_values(['rows', 'value'], ascending=[False, True])
+                summaries.counts[dim] = pd.Series(frame['rows'].to_numpy(), index=pd.Index(frame['value'], name=dim),
+                                                  name='count')
+        if total is not None and total['resolution_rows'].sum():
+            summaries.resolution_mean = total['resolution_sum'].sum() / total['resolution_rows'].sum()
+        if 'department' in by_dim:
+            dept = by_dim['department']
+            summaries.department_count = len(dept)
+            summaries.department_resolution = (
+                (dept['resolution_sum'] / dept['resolution_rows'].replace(0, np.nan)).sort_values(ascending=False)
+            )
+        if 'created_month' in by_dim:
+            summaries.monthly = by_dim['created_month']['rows'].sort_index().rename('count')
+            summaries.monthly.index.name = 'created_month'
+        if 'created_hour' in by_dim:
+            hourly = by_dim['created_hour']['rows']
+            hourly.index = hourly.index.astype('int64')
+            summaries.hourly = hourly.sort_index().rename('count')
+            summaries.hourly.index.name = 'created_hour'
+        return summaries
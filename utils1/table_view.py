@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils1.profiling import profiled
+
+# Server-side paging for the full-table views: filtering and sorting produce an
+# array of row positions, memoized per frame and view settings, and only the
+# requested page is sliced out and sent to the browser.
+PAGE_SIZES = [25, 50, 100, 250]
+ALL_COLUMNS = None
+MAX_VIEW_ENTRIES = 8
+
+_memo = OrderedDict()
+_lock = threading.Lock()
+
+
+def _matches(series, text):
+    # Case-insensitive substring match, tested once per distinct value.
+    codes, uniques = pd.factorize(series)
+    hit = pd.Index(uniques).astype(str).str.lower().str.contains(text, regex=False)
+    return np.append(np.asarray(hit, dtype=bool), False)[codes]
+
+
+def filter_positions(df, text, column=ALL_COLUMNS):
+    text = (text or "").strip().lower()
+    if not text:
+        return np.arange(len(df))
+    columns = df.columns if column is ALL_COLUMNS else [column]
+    mask = np.zeros(len(df), dtype=bool)
+    for col in columns:
+        mask |= _matches(df[col], text)
+    return np.flatnonzero(mask)
+
+
+def sort_positions(df, positions, column, ascending=True):
+    values = df[column].iloc[positions].reset_index(drop=True)
+    try:
+        order = values.sort_values(ascending=ascending, kind='stable', na_position='last').index
+    except TypeError:
+        # Raw exports can mix text and dates in one column; fall back to text order.
+        order = values.astype(str).where(values.notna()).sort_values(
+            ascending=ascending, kind='stable', na_position='last').index
+    return positions[order.to_numpy()]
+
+
+@profiled("table view")
+def view_positions(df, frame_key, text="", column=ALL_COLUMNS, sort_by=None, ascending=True):
+    # frame_key must identify df's contents, as with get_summaries.
+    memo_key = (frame_key, text.strip().lower(), column, sort_by, ascending)
+    with _lock:
+        if memo_key in _memo:
+            _memo.move_to_end(memo_key)
+            return _memo[memo_key]
+    positions = filter_positions(df, text, column)
+    if sort_by is not None:
+        positions = sort_positions(df, positions, sort_by, ascending)
+    positions = positions.astype(np.int32 if len(df) < 2 ** 31 else np.int64)
+    with _lock:
+        _memo[memo_key] = positions
+        while len(_memo) > MAX_VIEW_ENTRIES:
+            _memo.popitem(last=False)
+    return positions
+
+
+def page_count(total_rows, page_size):
+    return max(1, -(-total_rows // page_size))
+
+
+def page_frame(df, positions, page, page_size):
+    # page is 1-based and clamped into range.
+    page = min(max(1, page), page_count(len(positions), page_size))
+    start = (page - 1) * page_size
+    return df.iloc[positions[start:start + page_size]]
@@ -0,0 +1,47 @@
+import datetime
+
+import pandas as pd
+
+from utils1.profiling import profiled
+
+# The cleaned frame is kept sorted by created_time with missing times last, so a
+# date range is a contiguous block of rows found by binary search.
+
+
+@profiled("sort by created")
+def sort_by_created(df):
+    if 'created_time' not in df.columns:
+        return df
+    return df.sort_values('created_time', kind='stable', na_position='last', ignore_index=True)
+
+
+def _valid_rows(created):
+    # NaT sorts to the end, so the first missing position is a binary search away.
+    values = created.to_numpy()
+    lo, hi = 0, len(values)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if pd.isna(values[mid]):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def date_bounds(df):
+    if 'created_time' not in df.columns:
+        return None
+    created = df['created_time']
+    n_valid = _valid_rows(created)
+    if n_valid == 0:
+        return None
+    return created.iloc[0].date(), created.iloc[n_valid - 1].date()
+
+
+def slice_date_range(df, start_date, end_date):
+    # Inclusive of both dates; returns a positional slice rather than a masked copy.
+    created = df['created_time']
+    timed = created.iloc[:_valid_rows(created)]
+    lo = timed.searchsorted(pd.Timestamp(start_date), side='left')
+    hi = timed.searchsorted(pd.Timestamp(end_date + datetime.timedelta(days=1)), side='left')
+    return df.iloc[int(lo):int(max(lo, hi))]
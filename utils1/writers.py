@@ -0,0 +1,109 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils1 import cache
+from utils1.dtypes import DERIVED_COLUMNS
+from utils1.profiling import profiled
+
+# Cleaned-dataset exports, written to disk a chunk of rows at a time so a large
+# download never holds a second full copy of the frame as text. Files are kept
+# in the dataset cache, keyed per dataset version and format.
+EXPORT_FORMATS = {
+    'csv': ("CSV", "text/csv"),
+    'csv.gz': ("CSV (gzip)", "application/gzip"),
+    'csv.zst': ("CSV (zstd)", "application/zstd"),
+    'parquet': ("Parquet", "application/vnd.apache.parquet"),
+    'xlsx': ("Excel (xlsx)", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+EXPORT_CHUNK_ROWS = 50_000
+XLSX_MAX_ROWS = 1_048_575
+EXPORT_VERSION = 1
+
+_CSV_CODECS = {'csv': None, 'csv.gz': 'gzip', 'csv.zst': 'zstd'}
+_EXCEL_TYPES = (str, bool, int, float, datetime.date, datetime.time, datetime.timedelta)
+
+
+def export_frame(df):
+    # The derived time keys are internal; exports carry the cleaned columns only.
+    return df.drop(columns=DERIVED_COLUMNS, errors='ignore')
+
+
+def _chunks(df, chunk_rows):
+    # An empty frame still yields one chunk, so the header gets written.
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _write_csv(df, path, codec, chunk_rows):
+    import pyarrow as pa
+
+    out = open(path, 'wb') if codec is None else pa.CompressedOutputStream(path, codec)
+    with out:
+        for i, chunk in enumerate(_chunks(df, chunk_rows)):
+            out.write(chunk.to_csv(index=False, header=i == 0).encode('utf-8'))
+
+
+def _write_parquet(df, path, chunk_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Columns still holding mixed Python objects (raw Excel cells) go out as text.
+    text_columns = {col: 'string' for col in df.columns if df[col].dtype == object}
+    writer = None
+    try:
+        for chunk in _chunks(df, chunk_rows):
+            chunk = chunk.astype(text_columns)
+            if writer is None:
+                writer = pq.ParquetWriter(path, pa.Schema.from_pandas(chunk, preserve_index=False),
+                                          compression='zstd')
+            writer.write_table(pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _cell(value):
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    # Anything Excel has no cell type for (e.g. Periods) is written as text.
+    return value if isinstance(value, _EXCEL_TYPES) else str(value)
+
+
+def _write_xlsx(df, path, chunk_rows):
+    from openpyxl import Workbook
+
+    if len(df) > XLSX_MAX_ROWS:
+        raise ValueError(f"Excel sheets hold at most {XLSX_MAX_ROWS:,} data rows; use CSV or Parquet.")
+    # Write-only mode streams rows to a temporary file instead of keeping cells.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Cleaned")
+    ws.append([str(col) for col in df.columns])
+    for chunk in _chunks(df, chunk_rows):
+        for row in chunk.astype(object).itertuples(index=False, name=None):
+            ws.append([_cell(value) for value in row])
+    wb.save(path)
+
+
+@profiled("export file")
+def write_export(df, path, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    if fmt in _CSV_CODECS:
+        _write_csv(df, path, _CSV_CODECS[fmt], chunk_rows)
+    elif fmt == 'parquet':
+        _write_parquet(df, path, chunk_rows)
+    elif fmt == 'xlsx':
+        _write_xlsx(df, path, chunk_rows)
+    else:
+        raise ValueError(f"Unsupported export format '{fmt}'. Expected one of: {', '.join(EXPORT_FORMATS)}")
+    return path
+
+
+def cached_export(df, dataset_key, fmt):
+    # dataset_key must identify df's contents, as with get_summaries.
+    return cache.cached_file(dataset_key, f"export-v{EXPORT_VERSION}", fmt,
+                             lambda tmp: write_export(export_frame(df), tmp, fmt))